@@ -0,0 +1,182 @@
+# accounts/access.py
+"""
+Who is making the request: role and center, worked out once per request.
+
+ProfileBackend loads the user together with their profile and center (one
+joined query instead of a user query plus a profile and a center query), and
+AccessMiddleware hangs an Access descriptor built from it on request.access.
+The descriptor is also kept in the session from login on, for users loaded
+by a backend that does not join the profile.
+
+Role routing (who may see which page, where each role lands) lives here.
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.signals import user_logged_in
+from django.dispatch import receiver
+from django.utils.functional import SimpleLazyObject
+
+from .models import Profile
+
+SESSION_KEY = "_access"
+
+SUPERUSER = "superuser"
+CENTER_OWNER = "centerowner"
+USER = "user"
+
+# URL name each role lands on (and is sent back to)
+LANDING = {
+    SUPERUSER: "admin_dashboard",
+    CENTER_OWNER: "center_dashboard",
+    USER: "home",
+}
+
+
+class ProfileBackend(ModelBackend):
+    """ModelBackend that loads the profile and center with the user."""
+
+    def _users(self):
+        return get_user_model()._default_manager.select_related("profile__center")
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = self._users().get(**{UserModel.USERNAME_FIELD: username})
+        except UserModel.DoesNotExist:
+            # same hashing cost as a wrong password (see ModelBackend)
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    def get_user(self, user_id):
+        try:
+            user = self._users().get(pk=user_id)
+        except get_user_model().DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+class Access:
+    """Role and center of the requesting user (role is None when logged out or without a profile)."""
+
+    __slots__ = ("user_id", "role", "center_id", "center_code", "center_name")
+
+    def __init__(self, user_id=None, role=None, center_id=None, center_code="", center_name=""):
+        self.user_id = user_id
+        self.role = role
+        self.center_id = center_id
+        self.center_code = center_code
+        self.center_name = center_name
+
+    @classmethod
+    def for_user(cls, user):
+        """Access of `user`; no query when the profile was loaded with it."""
+        if not user.is_authenticated:
+            return cls()
+        if user.is_superuser:
+            return cls(user.pk, SUPERUSER)
+        try:
+            profile = user.profile
+        except Profile.DoesNotExist:
+            return cls(user.pk)
+        center = profile.center
+        return cls(user.pk, profile.role, center.pk, center.code, center.name)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other):
+        return isinstance(other, Access) and self.as_dict() == other.as_dict()
+
+    def __repr__(self):
+        return f"<Access {self.role} user={self.user_id} center={self.center_code or None}>"
+
+    @property
+    def is_superuser(self):
+        return self.role == SUPERUSER
+
+    @property
+    def is_center_owner(self):
+        return self.role == CENTER_OWNER
+
+    @property
+    def landing(self):
+        """URL name of this role's own page."""
+        return LANDING.get(self.role, "home")
+
+    def can_view_center(self, center_id):
+        """Superusers see every center, center owners their own."""
+        return self.is_superuser or (self.is_center_owner and self.center_id == center_id)
+
+
+def _profile_loaded(user):
+    return "profile" in user._state.fields_cache
+
+
+def get_access(request):
+    """
+    Access of request.user. A profile loaded with the user wins (and
+    refreshes the session copy); otherwise the session copy from login is
+    used, and only without one is the profile queried.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return Access()
+
+    session = getattr(request, "session", None)
+    stored = session.get(SESSION_KEY) if session is not None else None
+    if stored and stored.get("user_id") == user.pk and not user.is_superuser and not _profile_loaded(user):
+        return Access(**stored)
+
+    access = Access.for_user(user)
+    if session is not None and stored != access.as_dict():
+        session[SESSION_KEY] = access.as_dict()
+    return access
+
+
+class AccessMiddleware:
+    """Sets request.access (lazily, after AuthenticationMiddleware)."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        request.access = SimpleLazyObject(lambda: get_access(request))
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        # resolving request.access touches the database: async views go
+        # through aget_access()
+        return await self.get_response(request)
+
+
+async def aget_access(request):
+    """request.access from async code (None when logged out)."""
+    def resolve():
+        if not request.user.is_authenticated:
+            return None
+        request.access.role  # evaluate here, on the sync thread
+        return request.access
+    return await sync_to_async(resolve)()
+
+
+@receiver(user_logged_in)
+def remember_access(sender, request, user, **kwargs):
+    access = Access.for_user(user)
+    request.session[SESSION_KEY] = access.as_dict()
+    request.access = access
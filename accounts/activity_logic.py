@@ -3,33 +3,92 @@
 from datetime import timedelta
 
 from django.utils import timezone
-from django.db.models import Count
 
-from .models import DailyCustomer
+from .models import DailyCount
 
 
-def daily_counts_for_user(user, days=30):
+def daily_counts_for_user(user, days=30, today=None):
     """
-    Helper: returns lists of dates and counts for the last `days` days.
+    Helper: returns lists of dates and counts for the last `days` days
+    (ending at `today`, default: the current local date).
     Oldest → newest.
     """
-    today = timezone.localdate()
+    today = today or timezone.localdate()
     start_date = today - timedelta(days=days - 1)
 
     qs = (
-        DailyCustomer.objects
+        DailyCount.objects
         .filter(user=user, date__range=(start_date, today))
-        .values("date")
-        .annotate(count=Count("id"))
+        .values_list("date", "count")
     )
 
-    count_map = {row["date"]: row["count"] for row in qs}
+    count_map = dict(qs)
     dates = [start_date + timedelta(days=i) for i in range(days)]
     counts = [count_map.get(d, 0) for d in dates]
     return dates, counts
 
 
-def compute_activity_status(user):
+def daily_counts_for_users(users, days=30, today=None):
+    """
+    Bulk version of `daily_counts_for_user`: one query for all users.
+
+    Returns:
+      - dates: list of dates (oldest → newest)
+      - counts_by_user: {user_id: list of counts per date}
+    Users without any customers in the window get all zeros.
+    """
+    today = today or timezone.localdate()
+    return daily_counts_between(users, today - timedelta(days=days - 1), today)
+
+
+def daily_counts_between(users, start, end):
+    """
+    Same as `daily_counts_for_users`, for any date range (start..end inclusive).
+    Reads the DailyCount rollup, so the cost grows with users x days,
+    not with the number of customers.
+    """
+    user_ids = [getattr(u, "pk", u) for u in users]
+
+    qs = (
+        DailyCount.objects
+        .filter(user_id__in=user_ids, date__range=(start, end))
+        .values_list("user_id", "date", "count")
+    )
+
+    count_map = {(uid, d): c for uid, d, c in qs}
+    dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    counts_by_user = {
+        uid: [count_map.get((uid, d), 0) for d in dates]
+        for uid in user_ids
+    }
+    return dates, counts_by_user
+
+
+def compute_activity_status(user, today=None):
+    """
+    Activity status for a single user over the last 30 days.
+    See `activity_status_from_counts` for the rules.
+    """
+    dates, counts = daily_counts_for_user(user, days=30, today=today)
+    return activity_status_from_counts(dates, counts)
+
+
+def compute_activity_status_bulk(users, days=30, today=None):
+    """
+    Same result as `compute_activity_status`, for many users at once.
+
+    Fetches every (user, date, count) in the window with one query,
+    then runs the streak logic per user in memory.
+    Returns {user_id: (is_active, streak_dates, streak_counts, current_limit)}.
+    """
+    dates, counts_by_user = daily_counts_for_users(users, days=days, today=today)
+    return {
+        uid: activity_status_from_counts(dates, counts)
+        for uid, counts in counts_by_user.items()
+    }
+
+
+def activity_status_from_counts(dates, counts):
     """
     Activity logic with RESTART:
 
@@ -40,9 +99,9 @@ def compute_activity_status(user):
     - If they stay on the SAME limit > 7 days in a row, that long streak is treated as broken
       (they must increase at some point).
     - Final ACTIVE / INACTIVE is decided only from the **last valid streak segment**.
-    """
-    dates, counts = daily_counts_for_user(user, days=30)
 
+    `dates` / `counts` are oldest → newest, as returned by `daily_counts_for_user`.
+    """
     started = False
     streak_dates = []
     streak_counts = []
@@ -105,3 +164,32 @@ def compute_activity_status(user):
 
     # We have a valid final streak segment
     return True, streak_dates, streak_counts, current_limit
+
+
+def streak_step(state, day, count):
+    """
+    One day of `activity_status_from_counts`, for incremental updates.
+
+    state = (current_limit, run_length, streak_start); current_limit is None
+    when there is no running streak. Returns the state after `day`.
+    """
+    current_limit, run_length, streak_start = state
+
+    # Bad day → reset streak
+    if count < 3 or count >= 25:
+        return None, 0, None
+
+    # No active streak, or dropped below the limit → new streak from this day
+    if current_limit is None or count < current_limit:
+        return count, 1, day
+
+    if count > current_limit:
+        current_limit, run_length = count, 1
+    else:
+        run_length += 1
+
+    # Same limit > 7 days → streak broken
+    if run_length > 7:
+        return None, 0, None
+
+    return current_limit, run_length, streak_start
@@ -0,0 +1,89 @@
+# accounts/activity_matrix.py
+
+import numpy as np
+
+from .activity_logic import daily_counts_for_users
+
+
+def evaluate_count_matrix(counts):
+    """
+    Vectorized `activity_status_from_counts` for many users at once.
+
+    `counts` is a 2-D array (users × days), oldest → newest.
+    Returns three arrays, one entry per user:
+      - is_active: bool
+      - current_limit: int (3 when inactive)
+      - streak_start: column index of the first streak day (-1 when inactive)
+
+    Why this works without stepping day by day:
+    - while a streak runs, its limit is always the previous day's count
+      (start, drop and increase all set limit = count), so "drop" is just
+      counts[j] < counts[j - 1];
+    - run_length only grows over consecutive equal good days, and the streak
+      breaks on every 8th such day, so a day's state follows from its
+      position p inside its run of equal good days: p % 8 == 0 is a reset.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    if counts.ndim != 2:
+        raise ValueError("counts must be a 2-D (users × days) array")
+
+    n_users, n_days = counts.shape
+    if n_days == 0:
+        return (
+            np.zeros(n_users, dtype=bool),
+            np.full(n_users, 3, dtype=np.int64),
+            np.full(n_users, -1, dtype=np.int64),
+        )
+
+    cols = np.arange(n_days)
+    good = (counts >= 3) & (counts < 25)
+
+    prev_counts = np.empty_like(counts)
+    prev_counts[:, 0] = -1
+    prev_counts[:, 1:] = counts[:, :-1]
+    prev_good = np.zeros_like(good)
+    prev_good[:, 1:] = good[:, :-1]
+
+    # position inside each run of equal good days (1-based)
+    run_break = ~good | ~prev_good | (counts != prev_counts)
+    run_first = np.maximum.accumulate(np.where(run_break, cols, 0), axis=1)
+    position = cols - run_first + 1
+
+    reset = good & (position % 8 == 0)
+    started = good & ~reset
+
+    prev_reset = np.zeros_like(reset)
+    prev_reset[:, 1:] = reset[:, :-1]
+
+    # a new streak begins after a bad day / reset, or on a drop below the limit
+    streak_begin = good & (~prev_good | prev_reset | (counts < prev_counts))
+    last_begin = np.maximum.accumulate(np.where(streak_begin, cols, -1), axis=1)
+
+    is_active = started[:, -1]
+    current_limit = np.where(is_active, counts[:, -1], 3)
+    streak_start = np.where(is_active, last_begin[:, -1], -1)
+    return is_active, current_limit, streak_start
+
+
+def compute_activity_status_matrix(users, days=30, today=None):
+    """
+    Status for many users from one query + one vectorized pass.
+
+    Returns (dates, counts_by_user, statuses) where
+    statuses = {user_id: (is_active, current_limit, streak_start_date or None)}.
+    """
+    dates, counts_by_user = daily_counts_for_users(users, days=days, today=today)
+    user_ids = list(counts_by_user)
+
+    matrix = np.array([counts_by_user[uid] for uid in user_ids], dtype=np.int64).reshape(len(user_ids), days)
+    is_active, current_limit, streak_start = evaluate_count_matrix(matrix)
+
+    statuses = {
+        uid: (
+            bool(is_active[i]),
+            int(current_limit[i]),
+            dates[streak_start[i]] if streak_start[i] >= 0 else None,
+        )
+        for i, uid in enumerate(user_ids)
+    }
+    return dates, counts_by_user, statuses
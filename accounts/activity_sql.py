@@ -0,0 +1,164 @@
+# accounts/activity_sql.py
+"""
+The streak state machine (activity_status_from_counts) computed by the
+database, with window functions over the date-ordered DailyCount rows.
+
+Only the rows of each user's final streak leave the database, and the set
+of active users can be used inside other queries (filter / order a
+dashboard by status) without loading any counts into Python.
+
+The rules are rebuilt the way evaluate_count_matrix() does it:
+  - a day with no DailyCount row counts 0, so two rows only follow each
+    other when their dates are one day apart (LAG of the day number);
+  - runs of equal good days are numbered with a running sum of "run
+    breaks", and every 8th day of a run (ROW_NUMBER % 8 = 0) ends the streak;
+  - a streak begins on a good day after a bad day / gap, after such an
+    8th day, or on a drop below the previous day's count; a running sum of
+    these begins numbers the segments, and the user's last segment is the
+    streak if it reaches today on a good day.
+"""
+
+from datetime import date, timedelta
+
+from django.db import connection
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from .models import DailyCount, Profile
+from .rollups import MAX_PER_DAY, MIN_NEW_DAY
+
+# day number of a DATE column, so consecutive days differ by exactly 1
+DAY_NUMBER_SQL = {
+    "sqlite": "CAST(julianday({column}) AS INTEGER)",
+    "postgresql": "({column} - DATE '1970-01-01')",
+    "mysql": "TO_DAYS({column})",
+}
+
+_STREAK_ROWS_SQL = """
+WITH counts AS (
+    SELECT dc.user_id, dc.date, dc.count,
+           {day_number} AS day,
+           CASE WHEN dc.count >= {min_count} AND dc.count < {max_count} THEN 1 ELSE 0 END AS good
+    FROM {table} dc
+    WHERE dc.date BETWEEN %s AND %s AND dc.user_id IN ({users})
+),
+neighbours AS (
+    SELECT user_id, date, count, good,
+           CASE WHEN LAG(day) OVER w = day - 1 AND LAG(good) OVER w = 1 THEN 1 ELSE 0 END AS prev_good,
+           LAG(count) OVER w AS prev_count
+    FROM counts
+    WINDOW w AS (PARTITION BY user_id ORDER BY date)
+),
+runs AS (
+    SELECT user_id, date, count, good, prev_good, prev_count,
+           SUM(CASE WHEN good = 0 OR prev_good = 0 OR count <> prev_count THEN 1 ELSE 0 END)
+               OVER (PARTITION BY user_id ORDER BY date ROWS UNBOUNDED PRECEDING) AS run_id
+    FROM neighbours
+),
+resets AS (
+    SELECT user_id, date, count, good, prev_good, prev_count,
+           CASE WHEN good = 1 AND ROW_NUMBER() OVER (PARTITION BY user_id, run_id ORDER BY date) %% 8 = 0
+                THEN 1 ELSE 0 END AS is_reset
+    FROM runs
+),
+begins AS (
+    SELECT user_id, date, count, good, is_reset,
+           CASE WHEN good = 1 AND (prev_good = 0 OR LAG(is_reset) OVER w = 1 OR count < prev_count)
+                THEN 1 ELSE 0 END AS is_begin
+    FROM resets
+    WINDOW w AS (PARTITION BY user_id ORDER BY date)
+),
+segments AS (
+    SELECT user_id, date, count, good, is_reset,
+           SUM(is_begin) OVER (PARTITION BY user_id ORDER BY date ROWS UNBOUNDED PRECEDING) AS segment_id
+    FROM begins
+),
+last_rows AS (
+    SELECT user_id, date, count, segment_id,
+           FIRST_VALUE(CASE WHEN date = %s AND good = 1 AND is_reset = 0 THEN segment_id END)
+               OVER (PARTITION BY user_id ORDER BY date DESC) AS streak_segment
+    FROM segments
+)
+SELECT user_id, date, count
+FROM last_rows
+WHERE segment_id = streak_segment
+"""
+
+
+def _day_number(column):
+    try:
+        return DAY_NUMBER_SQL[connection.vendor].format(column=column)
+    except KeyError:
+        raise NotImplementedError(f"no day number expression for {connection.vendor}") from None
+
+
+def streak_rows_sql(users_sql, users_params, days=30, today=None):
+    """
+    (sql, params) selecting (user_id, date, count) for every day of the
+    current streak of each active user, over the `days` days ending today.
+    `users_sql` is a subquery (or comma-separated placeholders) of user ids.
+    """
+    today = today or timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    sql = _STREAK_ROWS_SQL.format(
+        day_number=_day_number("dc.date"),
+        min_count=MIN_NEW_DAY,
+        max_count=MAX_PER_DAY,
+        table=connection.ops.quote_name(DailyCount._meta.db_table),
+        users=users_sql,
+    )
+    start, today = (connection.ops.adapt_datefield_value(d) for d in (start, today))
+    return sql, (start, today, *users_params, today)
+
+
+def active_users_sql(users_sql, users_params, days=30, today=None):
+    """(sql, params) selecting the ids of the active users among `users_sql`."""
+    sql, params = streak_rows_sql(users_sql, users_params, days, today)
+    return f"SELECT DISTINCT user_id FROM ({sql}) streaks", params
+
+
+def _center_users_sql(center_id):
+    return Profile.objects.filter(center_id=center_id, role="user").values("user_id").query.sql_with_params()
+
+
+def center_active_users(center_id, days=30, today=None):
+    """RawSQL of the active users of a center, for `user_id__in=` filters."""
+    return RawSQL(*active_users_sql(*_center_users_sql(center_id), days=days, today=today))
+
+
+def annotate_activity_status(profiles, center_id, days=30, today=None):
+    """`profiles` of one center annotated with `sql_is_active`, to filter or order on."""
+    sql, params = active_users_sql(*_center_users_sql(center_id), days=days, today=today)
+    column = f"{connection.ops.quote_name(Profile._meta.db_table)}.{connection.ops.quote_name('user_id')}"
+    return profiles.annotate(
+        sql_is_active=RawSQL(f"{column} IN ({sql})", params, output_field=BooleanField())
+    )
+
+
+def _as_date(value):
+    # raw cursors return SQLite dates as text
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def compute_activity_status_sql(users, days=30, today=None, batch_size=500):
+    """
+    Same result as compute_activity_status_bulk(users), worked out in the
+    database: {user_id: (is_active, streak_dates, streak_counts, current_limit)}.
+    """
+    user_ids = [getattr(u, "pk", u) for u in users]
+    streaks = {uid: ([], []) for uid in user_ids}
+
+    with connection.cursor() as cursor:
+        for i in range(0, len(user_ids), batch_size):
+            batch = user_ids[i:i + batch_size]
+            sql, params = streak_rows_sql(", ".join(["%s"] * len(batch)), batch, days, today)
+            cursor.execute(f"{sql} ORDER BY user_id, date", params)
+            for uid, day, count in cursor.fetchall():
+                streaks[uid][0].append(_as_date(day))
+                streaks[uid][1].append(count)
+
+    return {
+        uid: (True, dates, counts, counts[-1]) if dates else (False, [], [], 3)
+        for uid, (dates, counts) in streaks.items()
+    }
@@ -1,11 +1,19 @@
 from django.contrib import admin
-from .models import Profile, DailyCustomer
+from .models import Center, Profile, DailyCustomer, DailyCount, ActivitySnapshot
+
+
+@admin.register(Center)
+class CenterAdmin(admin.ModelAdmin):
+    list_display = ("code", "name", "owner")
+    search_fields = ("code", "name")
+    raw_id_fields = ("owner",)
 
 
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
     list_display = ("user", "role", "center")
     list_filter = ("role", "center")
+    list_select_related = ("user", "center")
     search_fields = ("user__username", "user__email")
 
 
@@ -13,4 +21,19 @@ class ProfileAdmin(admin.ModelAdmin):
 class DailyCustomerAdmin(admin.ModelAdmin):
     list_display = ("user", "date", "name", "phone")
     list_filter = ("date", "user__profile__center")
+    ordering = ("date",)
     search_fields = ("user__username", "name", "phone")
+
+
+@admin.register(DailyCount)
+class DailyCountAdmin(admin.ModelAdmin):
+    list_display = ("user", "date", "count")
+    list_filter = ("date",)
+    search_fields = ("user__username",)
+
+
+@admin.register(ActivitySnapshot)
+class ActivitySnapshotAdmin(admin.ModelAdmin):
+    list_display = ("user", "as_of", "is_active", "current_limit", "streak_start")
+    list_filter = ("is_active", "as_of")
+    search_fields = ("user__username",)
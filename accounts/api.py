@@ -0,0 +1,200 @@
+# accounts/api.py
+"""
+Read-only JSON versions of the home and dashboard pages (mobile client, kiosks).
+
+Every response carries a strong ETag built from the data version of the
+user or center (see accounts/dashboard_cache.py), a fingerprint of the
+rows the response is built from, and the request's own parameters. A poll
+with a matching If-None-Match gets 304 Not Modified before any activity
+status is computed.
+
+The fingerprint is what keeps the ETag honest when the cache is not
+shared: a worker that never saw another worker's version bump still sees
+the new rows.
+"""
+
+from datetime import date, timedelta
+
+from django.contrib.auth.decorators import login_required
+from django.db.models import Count, Max, Q, Sum
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import condition, require_GET
+
+from .dashboard_cache import center_version, data_etag, user_version
+from .db import replica_reads_view
+from .models import Center, DailyCount, DailyCustomer, Profile
+from .snapshots import WINDOW_DAYS, snapshot_activity_status
+from .views import DASHBOARD_PAGE_SIZE, _center_dashboard_page, _status_filter
+
+
+def _selected_date(request, today):
+    try:
+        return date.fromisoformat(request.GET.get("date") or "")
+    except ValueError:
+        return today
+
+
+def _admin_center_row(request, center_code):
+    """The center being viewed by the admin, looked up once per request."""
+    cached = getattr(request, "_api_center", None)
+    if cached is None or cached[0] != center_code:
+        row = Center.objects.filter(code=center_code).values("id", "code", "name").first()
+        cached = request._api_center = (center_code, row)
+    return cached[1]
+
+
+def _page_parts(request, today):
+    return (
+        _selected_date(request, today),
+        (request.GET.get("q") or "").strip(),
+        request.GET.get("after") or None,
+        request.GET.get("before") or None,
+        today,
+        DASHBOARD_PAGE_SIZE,
+        _status_filter(request),
+    )
+
+
+# --- row fingerprints: one aggregate over the rows a response reads ---
+
+def _read_dates(today, selected_date):
+    # the status window plus the selected day
+    return Q(date__range=(today - timedelta(days=WINDOW_DAYS - 1), today)) | Q(date=selected_date)
+
+
+def _user_rows_state(user_id, today, selected_date):
+    """Customers (count, last id) of one user on the days home shows, on the (user, date) index."""
+    state = DailyCustomer.objects.filter(_read_dates(today, selected_date), user_id=user_id).aggregate(
+        customers=Count("id"), last=Max("id"),
+    )
+    return tuple(state.values())
+
+
+def _center_rows_state(center_id, today, selected_date):
+    """Users and daily counts of one center on the days the dashboard shows."""
+    users = Profile.objects.filter(center_id=center_id, role="user").aggregate(users=Count("id"), last=Max("id"))
+    counts = DailyCount.objects.filter(
+        _read_dates(today, selected_date), user__profile__center_id=center_id, user__profile__role="user",
+    ).aggregate(rows=Count("id"), total=Sum("count"), last=Max("id"))
+    return (*users.values(), *counts.values())
+
+
+# --- ETags (None = no conditional handling, e.g. the request will be refused) ---
+
+def _home_etag(request):
+    if request.access.is_center_owner:
+        return None
+    today = timezone.localdate()
+    selected_date = _selected_date(request, today)
+    uid = request.user.pk
+    state = (user_version(uid), _user_rows_state(uid, today, selected_date))
+    return data_etag(("user", uid), state, (today, selected_date))
+
+
+def _center_page_etag(request, center_id):
+    today = timezone.localdate()
+    parts = _page_parts(request, today)
+    request._rows_state = _center_rows_state(center_id, today, parts[0])  # the page is cached under it
+    return data_etag(("center", center_id), (center_version(center_id), request._rows_state), parts)
+
+
+def _center_etag(request):
+    if not request.access.is_center_owner:
+        return None
+    return _center_page_etag(request, request.access.center_id)
+
+
+def _admin_center_etag(request, center_code):
+    center = _admin_center_row(request, center_code)
+    if not request.user.is_superuser or center is None:
+        return None
+    return _center_page_etag(request, center["id"])
+
+
+# --- views ---
+
+@login_required
+@require_GET
+@condition(etag_func=_home_etag)
+def home_api_view(request):
+    """
+    JSON mirror of home_view for a normal user.
+      - ?date=YYYY-MM-DD (default: today) selects the customer list
+    """
+    access = request.access
+    if access.is_center_owner:
+        return JsonResponse({"error": "Center owners use the center dashboard API"}, status=403)
+
+    today = timezone.localdate()
+    selected_date = _selected_date(request, today)
+
+    customers = list(
+        DailyCustomer.objects
+        .filter(user=request.user, date=selected_date)
+        .order_by("id")
+        .values("name", "phone")
+    )
+    is_active, streak_dates, streak_counts, current_limit = snapshot_activity_status(request.user, today)
+
+    return JsonResponse({
+        "username": request.user.username,
+        "role": "user",
+        "center": {"code": access.center_code, "name": access.center_name} if access.center_id else None,
+        "today": today,
+        "date": selected_date,
+        "customers": customers,
+        "count": len(customers),
+        "status": {
+            "active": is_active,
+            "current_limit": current_limit,
+            "streak": [{"date": d, "count": c} for d, c in zip(streak_dates, streak_counts)],
+        },
+    })
+
+
+def _dashboard_payload(request, center_id, code, name):
+    today = timezone.localdate()
+    selected_date, search = _page_parts(request, today)[:2]
+    page = _center_dashboard_page(
+        request, center_id, selected_date, search, today, rows_state=getattr(request, "_rows_state", None),
+    )
+    return JsonResponse({
+        "center": {"code": code, "name": name},
+        "today": today,
+        "date": selected_date,
+        "search": search,
+        "status": _status_filter(request),
+        "users": page["users_data"],
+        "next_after": page["next_after"],
+        "prev_before": page["prev_before"],
+    })
+
+
+@login_required
+@require_GET
+@replica_reads_view
+@condition(etag_func=_center_etag)
+def center_dashboard_api_view(request):
+    """
+    JSON mirror of center_dashboard_view (center owners only).
+      - ?date=, ?q=, ?after= / ?before= as on the HTML page
+    """
+    access = request.access
+    if not access.is_center_owner:
+        return JsonResponse({"error": "Not allowed"}, status=403)
+    return _dashboard_payload(request, access.center_id, access.center_code, access.center_name)
+
+
+@login_required
+@require_GET
+@replica_reads_view
+@condition(etag_func=_admin_center_etag)
+def admin_center_dashboard_api_view(request, center_code):
+    """JSON mirror of admin_center_dashboard_view (superuser only)."""
+    if not request.user.is_superuser:
+        return JsonResponse({"error": "Not allowed"}, status=403)
+    center = _admin_center_row(request, center_code)
+    if center is None:
+        return JsonResponse({"error": "Unknown center"}, status=404)
+    return _dashboard_payload(request, center["id"], center["code"], center["name"])
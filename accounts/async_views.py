@@ -0,0 +1,133 @@
+# accounts/async_views.py
+"""
+Async (ASGI) versions of the home and dashboard pages.
+
+Same templates and data as the views in accounts/views.py, but written as
+coroutines for an ASGI server (see mysite/asgi.py).
+
+Note: in Django 4.2 the async ORM runs each query through sync_to_async
+on the request's single sync thread, like the sync_to_async loaders here,
+so gathering them would not run any two at once: they are awaited one
+after another, as the sync views run them.
+"""
+
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404
+from django.shortcuts import redirect, render
+from django.utils import timezone
+
+from .access import aget_access
+from .db import replica_reads_view
+from .models import Center, DailyCustomer
+from .snapshots import snapshot_activity_status
+from .trends import TREND_RANGES, user_trends
+from .views import (
+    _center_dashboard_page,
+    _center_trends_context,
+    _status_filter,
+    _trend_days,
+    save_posted_customers,
+)
+
+
+def _selected_date(request, today):
+    try:
+        return date.fromisoformat(request.GET.get("date") or "")
+    except ValueError:
+        return today
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def home_async_view(request):
+    """Async home_view."""
+    access = await aget_access(request)
+    if access is None:
+        return redirect_to_login(request.get_full_path())
+    if access.is_center_owner:
+        return redirect("center_dashboard_async")
+    user = request.user  # loaded by aget_access()
+
+    today = timezone.localdate()
+    selected_date = _selected_date(request, today)
+    trend_days = _trend_days(request)
+
+    message = None
+    error = None
+
+    if request.method == "POST":
+        message, error = await sync_to_async(save_posted_customers)(request, selected_date, today)
+
+    customers = await _alist(DailyCustomer.objects.filter(user=user, date=selected_date).order_by("id"))
+    is_active, streak_dates, streak_counts, current_limit = await sync_to_async(snapshot_activity_status)(
+        user, today
+    )
+    trends = await sync_to_async(user_trends)([user], trend_days, today)
+
+    context = {
+        "role_label": "User",
+        "center_label": access.center_name,
+        "selected_date": selected_date,
+        "today": today,
+        "trends": trends[user.pk],
+        "trend_days": trend_days,
+        "trend_ranges": TREND_RANGES,
+        "customers": customers,
+        "message": message,
+        "error": error,
+        "streak_status_text": "Active user" if is_active else "Inactive user",
+        "streak_dates_counts": list(zip(streak_dates, streak_counts)),
+        "current_limit": current_limit,
+    }
+    return await sync_to_async(render)(request, "home.html", context)
+
+
+async def _render_center_dashboard(request, center_id, center_name):
+    today = timezone.localdate()
+    selected_date = _selected_date(request, today)
+    search = (request.GET.get("q") or "").strip()
+
+    page = await sync_to_async(_center_dashboard_page)(request, center_id, selected_date, search, today)
+    trends = await sync_to_async(_center_trends_context)(request, center_id, today)
+
+    context = {
+        "center_label": center_name,
+        "today": today,
+        "selected_date": selected_date,
+        "search": search,
+        "status": _status_filter(request),
+        **page,
+        **trends,
+    }
+    return await sync_to_async(render)(request, "center_dashboard.html", context)
+
+
+@replica_reads_view
+async def center_dashboard_async_view(request):
+    """Async center_dashboard_view (center owners only)."""
+    access = await aget_access(request)
+    if access is None:
+        return redirect_to_login(request.get_full_path())
+    if not access.is_center_owner:
+        return redirect("home_async")
+    return await _render_center_dashboard(request, access.center_id, access.center_name)
+
+
+@replica_reads_view
+async def admin_center_dashboard_async_view(request, center_code):
+    """Async admin_center_dashboard_view (superuser only)."""
+    access = await aget_access(request)
+    if access is None:
+        return redirect_to_login(request.get_full_path())
+    if not access.is_superuser:
+        return redirect("home_async")
+
+    center = await Center.objects.filter(code=center_code).afirst()
+    if center is None:
+        raise Http404("No Center matches the given query.")
+    return await _render_center_dashboard(request, center.pk, center.name)
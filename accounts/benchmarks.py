@@ -0,0 +1,375 @@
+# accounts/benchmarks.py
+"""
+Benchmarks for every page and the admin report, at several data scales.
+
+Each target is run once on a cold cache (snapshots and dashboard pages are
+built) and then `repeat` times warm, through the Django test client. Query
+counts and wall times go to a JSON file that can be diffed across commits.
+
+The async pages are timed through AsyncClient (the ASGI handler), and a
+batch of concurrent ASGI requests is compared with the same number of WSGI
+requests served one after another, as a single sync worker would.
+
+On SQLite, concurrent home page saves (add_customers) and admin dashboard
+reads are also run against SQLite's default rollback journal and in WAL
+mode, on database files of their own.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections, transaction
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+
+from .db import enable_sqlite_wal
+from .models import Center
+from .reports import build_report_rows, write_report
+from .rollups import MAX_PER_DAY, MIN_NEW_DAY, add_customers
+from .synthetic import generate_dataset
+from .views import _build_center_summaries
+
+
+def parse_scales(value):
+    """"2x20,5x50" -> [(2, 20), (5, 50)] (centers x users per center)."""
+    scales = []
+    for part in value.split(","):
+        centers, _, users = part.strip().partition("x")
+        if not (centers.isdigit() and users.isdigit()):
+            raise ValueError(f"bad scale {part!r}, expected <centers>x<users>")
+        scales.append((int(centers), int(users)))
+    return scales
+
+
+def _timed(fn):
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        status = fn()
+        elapsed = time.perf_counter() - start
+    return status, len(queries), round(elapsed * 1000, 2)
+
+
+def _measure(fn, repeat):
+    cache.clear()
+    status, cold_queries, cold_ms = _timed(fn)
+    warm = [_timed(fn) for _ in range(repeat)]
+    return {
+        "status": status,
+        "cold_queries": cold_queries,
+        "cold_ms": cold_ms,
+        "warm_queries": max(q for _, q, _ in warm) if warm else None,
+        "warm_ms_median": round(statistics.median(ms for _, _, ms in warm), 2) if warm else None,
+        "warm_ms_min": min(ms for _, _, ms in warm) if warm else None,
+    }
+
+
+def _admin_report():
+    # the one-pass build of admin_activity_report.py; importing the script
+    # would run django.setup() again and reset the logging set up here
+    with tempfile.TemporaryDirectory() as tmp:
+        write_report(Path(tmp) / "report.csv", build_report_rows())
+    return "ok"
+
+
+def _concurrency(client, async_client, sync_url, async_url, requests):
+    """
+    Wall time of `requests` requests to the sync view in a row (one WSGI
+    worker) vs the same number to the async view gathered over ASGI.
+    """
+    start = time.perf_counter()
+    for _ in range(requests):
+        client.get(sync_url)
+    wsgi_ms = (time.perf_counter() - start) * 1000
+
+    async def burst():
+        return await asyncio.gather(*(async_client.get(async_url) for _ in range(requests)))
+
+    start = time.perf_counter()
+    async_to_sync(burst)()
+    asgi_ms = (time.perf_counter() - start) * 1000
+    return {"requests": requests, "wsgi_ms": round(wsgi_ms, 2), "asgi_ms": round(asgi_ms, 2)}
+
+
+@contextmanager
+def using_database(settings_dict):
+    """
+    Point the calling thread's "default" connection (Django keeps one per
+    thread) at `settings_dict` for the block, with the usual connection
+    setup (accounts/db.py); the thread's own connection is put back after.
+    """
+    previous = connections["default"]
+    conn = type(previous)(settings_dict, alias="default")
+    connections["default"] = conn
+    try:
+        yield conn
+    finally:
+        conn.close()
+        connections["default"] = previous
+
+
+def run_in_threads(settings_dict, targets):
+    """
+    Call every function of `targets` in its own thread, on its own
+    connection to `settings_dict`; returns their results (or the exception
+    raised), in order.
+    """
+    results = [None] * len(targets)
+
+    def run(i, target):
+        with using_database(settings_dict):
+            try:
+                results[i] = target()
+            except Exception as exc:  # reported to the caller
+                results[i] = exc
+
+    threads = [threading.Thread(target=run, args=(i, t)) for i, t in enumerate(targets)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def sqlite_file_database(path):
+    """Settings for a new SQLite file at `path`, migrated to the project's schema."""
+    settings_dict = {**connection.settings_dict, "NAME": str(path)}
+    [error] = run_in_threads(settings_dict, [lambda: call_command("migrate", verbosity=0)])
+    if error is not None:
+        raise error
+    return settings_dict
+
+
+def sqlite_concurrency(path, wal=False, writers=2, readers=4, seconds=2.0, centers=2, users_per_center=50):
+    """
+    Parallel writers and readers on a fresh SQLite file at `path` (in WAL
+    mode when `wal`), through Django connections set up as accounts/db.py
+    does: writers save batches of MIN_NEW_DAY customers with add_customers(),
+    as the home page does, while readers build the admin dashboard's center
+    summaries over a synthetic dataset of `centers` x `users_per_center`.
+
+    Returns writes / reads done, write latency and database errors
+    ("database is locked").
+    """
+    db = sqlite_file_database(path)
+    today = timezone.localdate()
+
+    def setup():
+        if wal:
+            enable_sqlite_wal(connection)
+        # histories end yesterday: today is a new day for every writer
+        generate_dataset(
+            centers, users_per_center, today=today - timedelta(days=1), prefix="sqlite", customers=False,
+        )
+        return list(User.objects.filter(profile__role="user").order_by("pk"))
+
+    [users] = run_in_threads(db, [setup])
+    if isinstance(users, Exception):
+        raise users
+
+    batch = [("Benchmark", "0")] * MIN_NEW_DAY
+    stop = time.perf_counter() + seconds
+    latencies, reads, errors = [], [0], [0]
+    lock = threading.Lock()
+
+    def writer(n):
+        # fill each user's day up to MAX_PER_DAY, then move to the next user
+        for user in users[n::writers]:
+            for _ in range(MAX_PER_DAY // len(batch)):
+                if time.perf_counter() >= stop:
+                    return
+                start = time.perf_counter()
+                try:
+                    add_customers(user, today, batch)
+                except OperationalError:
+                    with lock:
+                        errors[0] += 1
+                    continue
+                with lock:
+                    latencies.append(time.perf_counter() - start)
+
+    def reader():
+        while time.perf_counter() < stop:
+            try:
+                _build_center_summaries(today)
+            except OperationalError:
+                with lock:
+                    errors[0] += 1
+                continue
+            with lock:
+                reads[0] += 1
+
+    targets = [lambda n=n: writer(n) for n in range(writers)] + [reader] * readers
+    for result in run_in_threads(db, targets):
+        if isinstance(result, Exception):
+            raise result
+
+    latencies.sort()
+    return {
+        "writes": len(latencies),
+        "reads": reads[0],
+        "errors": errors[0],
+        "write_ms_median": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        "write_ms_max": round(latencies[-1] * 1000, 2) if latencies else None,
+    }
+
+
+def compare_sqlite_modes(**kwargs):
+    """sqlite_concurrency() with SQLite's rollback journal vs WAL mode (see accounts/db.py)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        return {
+            "default": sqlite_concurrency(str(Path(tmp) / "default.sqlite3"), **kwargs),
+            "wal": sqlite_concurrency(str(Path(tmp) / "wal.sqlite3"), wal=True, **kwargs),
+        }
+
+
+def benchmark_scale(
+    centers, users_per_center, repeat=5, min_days=30, max_days=365, seed=0, prefix="bench", concurrency=10,
+):
+    """
+    Generate one dataset and time every target against it.
+    The admin pages need their (DEBUG-only) URLs, see run_benchmarks().
+    """
+    start = time.perf_counter()
+    rows = generate_dataset(
+        centers, users_per_center, min_days=min_days, max_days=max_days, seed=seed, prefix=prefix
+    )
+    generate_s = round(time.perf_counter() - start, 2)
+
+    center = Center.objects.filter(code__startswith=f"{prefix}-").order_by("code").first()
+    owner = center.owner
+    user = User.objects.filter(profile__center=center, profile__role="user").order_by("username").first()
+    admin = User.objects.create_superuser(f"{prefix}-admin", password="x")
+
+    client = Client()
+    async_client = AsyncClient()
+    signups = itertools.count()
+
+    def page(url):
+        return lambda: client.get(url).status_code
+
+    def async_page(url):
+        async def get():
+            return (await async_client.get(url)).status_code
+        return async_to_sync(get)
+
+    def signup():
+        password = f"sig@{center.code}"
+        return Client().post("/", {
+            "email": f"signup{next(signups):06d}@example.com",
+            "password": password,
+            "confirm_password": password,
+            "role": "user",
+            "center": center.code,
+        }).status_code
+
+    # name: (logged-in user or None, target)
+    targets = {
+        "home": (user, page("/home/")),
+        "home_api": (user, page("/api/home/")),
+        "center_dashboard": (owner, page("/center-dashboard/")),
+        "center_dashboard_api": (owner, page("/api/center-dashboard/")),
+        "admin_dashboard": (admin, page("/admin-dashboard/")),
+        "admin_center_dashboard": (admin, page(f"/admin-dashboard/{center.code}/")),
+        "home_async": (user, async_page("/async/home/")),
+        "center_dashboard_async": (owner, async_page("/async/center-dashboard/")),
+        "admin_center_dashboard_async": (admin, async_page(f"/async/admin-dashboard/{center.code}/")),
+        "signup_form": (None, lambda: Client().get("/").status_code),
+        "signup_post": (None, signup),
+        "build_admin_report": (None, _admin_report),
+    }
+    results = {}
+    for name, (who, fn) in targets.items():
+        if who is not None:
+            # outside the timings
+            client.force_login(who)
+            async_client.force_login(who)
+        results[name] = _measure(fn, repeat)
+
+    concurrent = {}
+    for name, who, sync_url, async_url in [
+        ("home", user, "/home/", "/async/home/"),
+        ("center_dashboard", owner, "/center-dashboard/", "/async/center-dashboard/"),
+    ]:
+        client.force_login(who)
+        async_client.force_login(who)
+        concurrent[name] = _concurrency(client, async_client, sync_url, async_url, concurrency)
+
+    return {
+        "centers": centers,
+        "users_per_center": users_per_center,
+        "rows": rows,
+        "generate_s": generate_s,
+        "results": results,
+        "concurrent": concurrent,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+    scales, repeat=5, output="benchmark_results.json", min_days=30, max_days=365, seed=0, concurrency=10, log=print,
+):
+    """
+    Run benchmark_scale() for every (centers, users_per_center) scale in a
+    throwaway test database (each scale rolled back) and write the JSON results.
+    """
+    setup_test_environment(debug=True)  # keep the DEBUG-only admin routes
+    metrics_logger = logging.getLogger("accounts.metrics")
+    metrics_level = metrics_logger.level
+    metrics_logger.setLevel(logging.WARNING)  # one JSON line per request would drown the output
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    report = {
+        "commit": _git_commit(),
+        "created": datetime.now(dt_timezone.utc).isoformat(timespec="seconds"),
+        "database": connection.vendor,
+        "repeat": repeat,
+        "scales": [],
+    }
+    try:
+        # record budget overruns instead of failing the run; read from the
+        # test database, not through the read alias
+        with override_settings(QUERY_BUDGET_RAISE=False, DATABASE_READ_ALIAS=None):
+            for centers, users in scales:
+                log(f"{centers} centers x {users} users ...")
+                with transaction.atomic():
+                    report["scales"].append(benchmark_scale(
+                        centers, users, repeat=repeat, min_days=min_days, max_days=max_days, seed=seed,
+                        concurrency=concurrency,
+                    ))
+                    transaction.set_rollback(True)
+                cache.clear()
+        if connection.vendor == "sqlite":
+            log("SQLite writers vs readers, default vs WAL ...")
+            report["sqlite_concurrency"] = compare_sqlite_modes()
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        metrics_logger.setLevel(metrics_level)
+
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return report
@@ -0,0 +1,67 @@
+# accounts/center_directory.py
+
+import threading
+import time
+
+from django.core.cache import cache
+
+from .models import Center
+
+# Shared version: a worker that registers a center bumps it, so every other
+# process drops its copy on its next request (one cheap cache get).
+_VERSION_KEY = "center-directory:version"
+
+# ...and a process never keeps its copy longer than this, so a center added
+# elsewhere shows up even when the cache is not shared between processes
+DIRECTORY_TTL = 60  # seconds
+
+_lock = threading.Lock()
+_directory = None  # (version, built at, CenterDirectory) built by this process
+
+
+class CenterDirectory:
+    """Precomputed signup dropdown: (code, name) choices plus a code lookup."""
+
+    def __init__(self, choices):
+        self.choices = tuple(choices)
+        self.codes = frozenset(code for code, _ in self.choices)
+
+    def __contains__(self, code):
+        return code in self.codes
+
+
+def _current_version():
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        cache.add(_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(_VERSION_KEY)
+    return version
+
+
+def _is_fresh(cached, version, now):
+    return cached is not None and cached[0] == version and now - cached[1] < DIRECTORY_TTL
+
+
+def center_directory():
+    """The center directory, built once per process and reused until invalidated or DIRECTORY_TTL old."""
+    global _directory
+    version = _current_version()
+    now = time.monotonic()
+    cached = _directory
+    if _is_fresh(cached, version, now):
+        return cached[2]
+
+    with _lock:
+        cached = _directory
+        if not _is_fresh(cached, version, now):
+            choices = Center.objects.order_by("code").values_list("code", "name")
+            cached = _directory = (version, now, CenterDirectory(choices))
+    return cached[2]
+
+
+def invalidate_center_directory():
+    """Drop the directory here and (through the shared version) in every other process."""
+    global _directory
+    with _lock:
+        _directory = None
+    cache.set(_VERSION_KEY, time.time_ns(), None)
@@ -0,0 +1,110 @@
+# accounts/dashboard_cache.py
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Profile
+
+
+# pseudo-center whose version moves whenever any center's data changes
+ALL_CENTERS = "__all_centers__"
+
+
+def _center_token(center):
+    # center ids or ALL_CENTERS; keep cache keys safe for every backend
+    return hashlib.md5(str(center).encode()).hexdigest()
+
+
+def _version_key(center):
+    return f"dashboard:center-version:{_center_token(center)}"
+
+
+def _user_version_key(user_id):
+    return f"dashboard:user-version:{user_id}"
+
+
+def _new_version():
+    # time-based, so a version evicted from the cache is never handed out again
+    return time.time_ns()
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:  # not in the cache (yet / any more)
+        cache.set(key, _new_version(), None)
+
+
+def _current_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_center_version(center):
+    """Invalidate every cached dashboard page of center id `center` (and the all-centers summary)."""
+    if center is None:
+        return
+    _bump(_version_key(center))
+    _bump(_version_key(ALL_CENTERS))
+
+
+def bump_user_version(user_id):
+    """Invalidate the data of `user_id` alone (e.g. their profile changed)."""
+    _bump(_user_version_key(user_id))
+
+
+def bump_user_center_version(user_id):
+    """Invalidate the data of `user_id` and the dashboard of the center they belong to."""
+    bump_user_version(user_id)
+    center = Profile.objects.filter(user_id=user_id).values_list("center_id", flat=True).first()
+    bump_center_version(center)
+
+
+def center_version(center):
+    """Current data version of center id `center` (or ALL_CENTERS)."""
+    return _current_version(_version_key(center))
+
+
+def user_version(user_id):
+    """Current data version of one user's own data (their customers and counts)."""
+    return _current_version(_user_version_key(user_id))
+
+
+def data_etag(scope, version, parts):
+    """Strong ETag for data at `version` of `scope`, as seen with `parts` (date, filters...)."""
+    return hashlib.sha1(repr((scope, version, parts)).encode()).hexdigest()
+
+
+def cached_center_page(center, parts, build):
+    """
+    Cached result of build() for one dashboard page of center id `center`
+    (ALL_CENTERS for pages that summarize every center).
+
+    `parts` are whatever the page depends on besides the center's data
+    (selected date, search, cursor, today...). The per-center version is read
+    in the same get_many() as the page, so a hit costs one cache round-trip;
+    a page stored under an older version is simply rebuilt.
+    """
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    version_key = _version_key(center)
+    data_key = f"dashboard:center:{_center_token(center)}:{digest}"
+
+    found = cache.get_many([version_key, data_key])
+    version = found.get(version_key)
+    if version is None:
+        version = _current_version(version_key)
+
+    entry = found.get(data_key)
+    if entry is not None and entry["version"] == version:
+        return entry["data"]
+
+    data = build()
+    timeout = getattr(settings, "DASHBOARD_CACHE_TIMEOUT", 300)
+    cache.set(data_key, {"version": version, "data": data}, timeout)
+    return data
@@ -0,0 +1,116 @@
+# accounts/db.py
+"""
+Database routing and connection setup.
+
+Writes, auth and sessions always go to "default". Reads made for the
+dashboards, the reports and the exports go to settings.DATABASE_READ_ALIAS
+(a read-only connection, or a real replica when DATABASE_REPLICA_URL is
+set) so they never queue behind the writes of the home page. Views opt in
+with @replica_reads; code that runs outside a view (streamed exports, the
+report script) passes read_db() to .using().
+
+SQLite connections wait for a busy writer instead of failing with
+"database is locked". WAL mode, where readers and the one writer no longer
+block each other, is stored in the database file itself, so it is switched
+on once per deployment (`manage.py enable_sqlite_wal`) rather than by every
+connection: a management command run against a checked-out db.sqlite3
+leaves the file as it was.
+"""
+
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+
+# always read from "default": a session or login must see its own writes
+PRIMARY_ONLY_APPS = {"auth", "sessions", "contenttypes", "admin"}
+
+# every new connection (none of them changes the database file)
+SQLITE_PRAGMAS = [
+    "PRAGMA busy_timeout = 5000",  # ms to wait for the writer's lock
+    "PRAGMA temp_store = MEMORY",
+]
+# persistent: run once by enable_sqlite_wal()
+SQLITE_WAL = "PRAGMA journal_mode = WAL"
+# connections to a database in WAL mode
+SQLITE_WAL_PRAGMAS = [
+    "PRAGMA synchronous = NORMAL",  # safe with WAL, fsync at checkpoints only
+]
+
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+def read_db():
+    """Alias for dashboard / report reads ("default" when no read alias is configured)."""
+    return getattr(settings, "DATABASE_READ_ALIAS", None) or "default"
+
+
+@contextmanager
+def replica_reads():
+    """Route the ORM reads made inside the block to read_db()."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def replica_reads_view(view):
+    """Decorator: run the (sync or async) view inside replica_reads()."""
+    if iscoroutinefunction(view):
+        @functools.wraps(view)
+        async def wrapper(*args, **kwargs):
+            with replica_reads():
+                return await view(*args, **kwargs)
+    else:
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            with replica_reads():
+                return view(*args, **kwargs)
+    return wrapper
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS or not _replica_reads.get():
+            return "default"
+        return read_db()
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # same data on every alias
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+def configure_connection(connection):
+    """Tune a new SQLite connection; the read alias is also made read-only."""
+    if connection.vendor != "sqlite" or connection.is_in_memory_db():
+        return
+    with connection.cursor() as cursor:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+        cursor.execute("PRAGMA journal_mode")
+        if cursor.fetchone()[0] == "wal":
+            for pragma in SQLITE_WAL_PRAGMAS:
+                cursor.execute(pragma)
+        if connection.alias != "default" and connection.alias == read_db():
+            cursor.execute("PRAGMA query_only = ON")
+
+
+def enable_sqlite_wal(connection):
+    """Switch the SQLite database behind `connection` to WAL mode (kept in the file); returns the mode."""
+    if connection.vendor != "sqlite" or connection.is_in_memory_db():
+        raise ValueError(f"{connection.alias} is not an SQLite database file")
+    with connection.cursor() as cursor:
+        cursor.execute(SQLITE_WAL)
+        mode = cursor.fetchone()[0]
+        if mode == "wal":
+            for pragma in SQLITE_WAL_PRAGMAS:
+                cursor.execute(pragma)
+    return mode
@@ -0,0 +1,216 @@
+# accounts/importer.py
+"""
+Bulk import of historical customer logs (CSV or JSONL).
+
+Input rows carry username, date, name and phone. They are read as a
+stream and committed in chunks, so memory stays flat whatever the file
+size and an interrupted import can resume after its last committed chunk.
+
+Consecutive rows for the same user and day form one batch, checked like a
+home page submission (see add_customers): a new day needs at least
+MIN_NEW_DAY customers and no day may go over MAX_PER_DAY, counting the
+customers already stored. Rows that fail are reported, never half-saved.
+"""
+
+import csv
+import json
+import time
+from datetime import date, timedelta
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .dashboard_cache import bump_center_version, bump_user_version
+from .models import ActivitySnapshot, DailyCount, DailyCustomer, Profile
+from .rollups import MAX_PER_DAY, MIN_NEW_DAY
+from .snapshots import WINDOW_DAYS
+
+IMPORT_FIELDS = ("username", "date", "name", "phone")
+IMPORT_FORMATS = ("csv", "jsonl")
+
+
+def iter_records(stream, fmt):
+    """(record number, dict) for every record of a CSV (with header) or JSONL text stream."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        missing = set(IMPORT_FIELDS) - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"CSV header is missing: {', '.join(sorted(missing))}")
+        yield from enumerate(reader, start=1)
+    elif fmt == "jsonl":
+        for number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield number, record if isinstance(record, dict) else {"_raw": line}
+    else:
+        raise ValueError(f"format must be one of: {', '.join(IMPORT_FORMATS)}")
+
+
+def _clean(record, user_ids, today):
+    """(user_id, date, name, phone) or a rejection reason."""
+    if "_raw" in record:
+        return "not a JSON object"
+    user_id = user_ids.get((record.get("username") or "").strip().lower())
+    if user_id is None:
+        return "unknown username"
+    try:
+        day = date.fromisoformat((record.get("date") or "").strip())
+    except ValueError:
+        return "date must be YYYY-MM-DD"
+    if day > today:
+        return "date in the future"
+    name = (record.get("name") or "").strip()
+    phone = (record.get("phone") or "").strip()
+    if not name or not phone:
+        return "name and phone are required"
+    if len(name) > 100 or len(phone) > 20:
+        return "name or phone too long"
+    return user_id, day, name, phone
+
+
+class CustomerImport:
+    """
+    One import run. Feed it `iter_records()`; it calls on_reject(number,
+    reason, record) for each rejected row and on_commit(stats) after each
+    committed chunk. The stats are the checkpoint to resume from:
+    "last_record" is the last committed record, "last_read" the last one
+    read (grouping reads ahead, so rows up to it may already be rejected).
+    """
+
+    COUNTERS = ("read", "imported", "rejected", "days", "seconds")
+
+    def __init__(self, chunk_size=5000, today=None, on_reject=None, on_commit=None):
+        self.chunk_size = chunk_size
+        self.today = today or timezone.localdate()
+        self.on_reject = on_reject or (lambda number, reason, record: None)
+        self.on_commit = on_commit or (lambda stats: None)
+        self.stats = {
+            "read": 0, "imported": 0, "rejected": 0, "days": 0, "last_record": 0, "last_read": 0, "seconds": 0.0,
+        }
+
+        # every username once, for the whole run
+        self.user_ids = {
+            username.lower(): uid
+            for username, uid in Profile.objects.filter(role="user").values_list("user__username", "user_id")
+        }
+        self.centers = dict(Profile.objects.filter(role="user").values_list("user_id", "center_id"))
+
+    def run(self, records, resume=None):
+        """
+        Import `records` and return the stats. `resume` is the checkpoint
+        (stats) of an interrupted run over the same records: the counters go
+        on from it, committed records are skipped and rows it already
+        rejected are not reported again.
+        """
+        if resume:
+            self.stats.update({key: resume.get(key, 0) for key in self.COUNTERS})
+            self.stats["last_record"] = resume["last_record"]
+            self.stats["last_read"] = resume.get("last_read", resume["last_record"])
+        self._started = time.perf_counter() - self.stats["seconds"]
+
+        chunk, size = [], 0
+        for key, batch in groupby(self._cleaned(records), key=lambda r: r[1][:2]):
+            batch = list(batch)
+            chunk.append((key, batch))
+            size += len(batch)
+            if size >= self.chunk_size:
+                self._commit(chunk)
+                chunk, size = [], 0
+        if chunk:
+            self._commit(chunk)
+        self._tick()
+        return self.stats
+
+    def _tick(self):
+        self.stats["seconds"] = round(time.perf_counter() - self._started, 3)
+
+    def _cleaned(self, records):
+        last_record, last_read = self.stats["last_record"], self.stats["last_read"]
+        for number, record in records:
+            if number <= last_record:
+                continue
+            # read (and counted / rejected) before the checkpoint was written
+            seen = number <= last_read
+            if not seen:
+                self.stats["read"] += 1
+                self.stats["last_read"] = number
+            row = _clean(record, self.user_ids, self.today)
+            if isinstance(row, str):
+                if not seen:
+                    self._reject(number, row, record)
+            else:
+                yield number, row, record
+
+    def _reject(self, number, reason, record):
+        self.stats["rejected"] += 1
+        self.on_reject(number, reason, record)
+
+    def _commit(self, chunk):
+        user_ids = {uid for (uid, _), _ in chunk}
+        days = [day for (_, day), _ in chunk]
+
+        with transaction.atomic():
+            # as in add_customers: write first (the day rows, so SQLite takes
+            # the write lock and waits out busy_timeout), then check and bump
+            # each day with a conditional UPDATE, so a home page submission
+            # for the same day is never lost or let over the cap
+            DailyCount.objects.bulk_create(
+                [DailyCount(user_id=uid, date=day) for (uid, day), _ in chunk],
+                ignore_conflicts=True,
+                batch_size=1000,
+            )
+
+            customers, changed = [], set()
+            for (uid, day), batch in chunk:
+                n = len(batch)
+                row = DailyCount.objects.filter(user_id=uid, date=day, count__lte=MAX_PER_DAY - n)
+                if n < MIN_NEW_DAY:
+                    row = row.filter(count__gt=0)
+                if not row.update(count=F("count") + n):
+                    current = DailyCount.objects.get(user_id=uid, date=day).count
+                    reason = (
+                        f"more than {MAX_PER_DAY} customers in one day"
+                        if current + n > MAX_PER_DAY
+                        else f"fewer than {MIN_NEW_DAY} customers for a new day"
+                    )
+                    for number, _, record in batch:
+                        self._reject(number, reason, record)
+                    continue
+                changed.add((uid, day))
+                customers.extend(
+                    DailyCustomer(user_id=uid, date=day, name=name, phone=phone)
+                    for _, (uid, day, name, phone), _ in batch
+                )
+
+            DailyCustomer.objects.bulk_create(customers, batch_size=1000)
+            # the rows written above for new days that were rejected
+            DailyCount.objects.filter(
+                user_id__in=user_ids, date__range=(min(days), max(days)), count=0,
+            ).delete()
+
+            # snapshots only advance day by day; drop the ones whose window
+            # just got new history so they are replayed on next read
+            window_start = self.today - timedelta(days=WINDOW_DAYS - 1)
+            touched = {uid for (uid, day) in changed}
+            recent = {uid for (uid, day) in changed if day >= window_start}
+            ActivitySnapshot.objects.filter(user_id__in=recent).delete()
+            transaction.on_commit(lambda: self._invalidate(touched))
+
+        self.stats["imported"] += len(customers)
+        self.stats["days"] += len(changed)
+        self.stats["last_record"] = max(number for _, batch in chunk for number, _, _ in batch)
+        self._tick()
+        self.on_commit(self.stats)
+
+    def _invalidate(self, user_ids):
+        for uid in user_ids:
+            bump_user_version(uid)
+        for center in {self.centers.get(uid) for uid in user_ids}:
+            bump_center_version(center)
@@ -0,0 +1,169 @@
+# accounts/instrumentation.py
+"""
+Per-request query and latency metrics.
+
+RequestMetricsMiddleware records, for every request, the number of SQL
+queries, the time spent in the database, in the whole view and in template
+rendering (through TimedDjangoTemplates). They are logged as one JSON line on
+the "accounts.metrics" logger and sent back in a Server-Timing header.
+
+Views can be given a query budget (settings.QUERY_BUDGETS, by URL name). Going
+over it raises QueryBudgetExceeded when settings.QUERY_BUDGET_RAISE is on
+(DEBUG and tests) and logs a warning otherwise.
+"""
+
+import contextvars
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger("accounts.metrics")
+
+_current = contextvars.ContextVar("request_metrics", default=None)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper() hook; concurrent async requests can
+        # share a connection, so only count queries run for this request
+        if _current.get() is not self:
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+
+def current_metrics():
+    """Metrics of the request being handled (None outside the middleware)."""
+    return _current.get()
+
+
+class _TimedTemplate:
+    def __init__(self, template):
+        self.template = template
+        self.origin = template.origin
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return self.template.render(context, request)
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, timing every render() for RequestMetricsMiddleware."""
+
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name))
+
+
+def query_budget(url_name):
+    budgets = getattr(settings, "QUERY_BUDGETS", {})
+    return budgets.get(url_name, getattr(settings, "DEFAULT_QUERY_BUDGET", None))
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def _install(metrics):
+    for conn in connections.all():
+        conn.execute_wrappers.append(metrics)
+
+
+def _uninstall(metrics):
+    for conn in connections.all():
+        if metrics in conn.execute_wrappers:
+            conn.execute_wrappers.remove(metrics)
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        # async views run their queries on the request's sync thread
+        # (sync_to_async), whose connections are the ones to wrap
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        await sync_to_async(_install)(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(_uninstall)(metrics)
+            _current.reset(token)
+        return self._finish(request, response, metrics, time.perf_counter() - start)
+
+    def _finish(self, request, response, metrics, view_time):
+        match = request.resolver_match
+        url_name = match.url_name if match else None
+
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={_ms(metrics.db_time)};desc="{metrics.queries} queries"',
+            f"tpl;dur={_ms(metrics.template_time)}",
+            f"view;dur={_ms(view_time)}",
+        ])
+        logger.info(json.dumps({
+            "url_name": url_name,
+            "method": request.method,
+            "status": response.status_code,
+            "queries": metrics.queries,
+            "db_ms": _ms(metrics.db_time),
+            "view_ms": _ms(view_time),
+            "template_ms": _ms(metrics.template_time),
+        }))
+
+        budget = query_budget(url_name)
+        if budget is not None and metrics.queries > budget:
+            message = f"{url_name} ran {metrics.queries} queries (budget {budget})"
+            if getattr(settings, "QUERY_BUDGET_RAISE", settings.DEBUG):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
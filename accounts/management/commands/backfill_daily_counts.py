@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from accounts.rollups import rebuild_daily_counts
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailyCount rollup table from raw DailyCustomer rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Rows per bulk insert (default: 2000).",
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild_daily_counts(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} daily count rows."))
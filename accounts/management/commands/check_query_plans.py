@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.query_plans import check_query_plans
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the dashboard, home and report queries and fail if any of "
+        "them falls back to a full table scan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--show-plans",
+            action="store_true",
+            help="Print every query plan, not only the failing ones.",
+        )
+
+    def handle(self, *args, **options):
+        failures = 0
+        for label, plan, scanned in check_query_plans():
+            if scanned:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f"FULL SCAN {label}: {', '.join(scanned)}"))
+            else:
+                self.stdout.write(f"ok  {label}")
+            if scanned or options["show_plans"]:
+                self.stdout.write("    " + plan.replace("\n", "\n    "))
+
+        if failures:
+            raise CommandError(f"{failures} hot queries fall back to a full table scan.")
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from accounts.db import enable_sqlite_wal
+
+
+class Command(BaseCommand):
+    help = (
+        "Switch the SQLite database to WAL mode, so dashboard reads and home "
+        "page writes stop blocking each other. Run once per deployed database; "
+        "the mode is stored in the file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default", help="Database alias (default: default).")
+
+    def handle(self, *args, **options):
+        try:
+            mode = enable_sqlite_wal(connections[options["database"]])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if mode != "wal":
+            raise CommandError(f"SQLite kept journal mode {mode!r}.")
+        self.stdout.write(self.style.SUCCESS("Journal mode: wal."))
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.synthetic import SYNTHETIC_PASSWORD, generate_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-generate synthetic centers, users and 30-365 day customer "
+        "histories for local load testing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--centers", type=int, default=5, help="Number of centers (default: 5).")
+        parser.add_argument("--users", type=int, default=50, help="Users per center (default: 50).")
+        parser.add_argument("--min-days", type=int, default=30, help="Shortest history in days (default: 30).")
+        parser.add_argument("--max-days", type=int, default=365, help="Longest history in days (default: 365).")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0).")
+        parser.add_argument("--prefix", default="synth", help="Center code / username prefix (default: synth).")
+        parser.add_argument(
+            "--no-customers",
+            action="store_true",
+            help="Only write the DailyCount rollups, not the individual customer rows.",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            stats = generate_dataset(
+                options["centers"],
+                options["users"],
+                min_days=options["min_days"],
+                max_days=options["max_days"],
+                seed=options["seed"],
+                prefix=options["prefix"],
+                customers=not options["no_customers"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {stats['centers']} centers, {stats['users']} users, "
+            f"{stats['daily_counts']} daily counts and {stats['customers']} customers "
+            f"in {elapsed:.1f}s."
+        ))
+        self.stdout.write(f"Every synthetic account uses the password {SYNTHETIC_PASSWORD!r}.")
@@ -0,0 +1,82 @@
+import csv
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.importer import IMPORT_FORMATS, CustomerImport, iter_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Import historical customer logs (CSV or JSONL with username, date, "
+        "name, phone) in bulk, checking the per-day customer rules."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV (with header) or JSONL file.")
+        parser.add_argument("--format", choices=IMPORT_FORMATS, dest="fmt", help="Default: from the file extension.")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Rows per transaction (default: 5000).",
+        )
+        parser.add_argument("--checkpoint", help="Checkpoint file (default: <path>.checkpoint).")
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Skip the records already committed according to the checkpoint.",
+        )
+        parser.add_argument("--rejects", help="Write rejected rows (record, reason, data) to this CSV file.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["fmt"] or os.path.splitext(path)[1].lstrip(".").lower()
+        if fmt not in IMPORT_FORMATS:
+            raise CommandError("Cannot tell the format from the extension; use --format.")
+        checkpoint = options["checkpoint"] or f"{path}.checkpoint"
+
+        resume = None
+        if options["resume"] and os.path.exists(checkpoint):
+            with open(checkpoint, encoding="utf-8") as f:
+                resume = json.load(f)
+            self.stdout.write(f"Resuming after record {resume['last_record']}.")
+
+        rejects_file = open(options["rejects"], "a", newline="", encoding="utf-8") if options["rejects"] else None
+        rejects = csv.writer(rejects_file) if rejects_file else None
+        reasons = {}
+
+        def on_reject(number, reason, record):
+            reasons[reason] = reasons.get(reason, 0) + 1
+            if rejects:
+                rejects.writerow([number, reason, json.dumps(record)])
+
+        def on_commit(stats):
+            tmp = f"{checkpoint}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"path": path, **stats}, f)
+            os.replace(tmp, checkpoint)
+            rate = stats["imported"] / max(stats["seconds"], 1e-9)
+            self.stdout.write(
+                f"  record {stats['last_record']}: {stats['imported']} imported, "
+                f"{stats['rejected']} rejected ({rate:,.0f} rows/s)"
+            )
+
+        try:
+            with open(path, newline="", encoding="utf-8") as f:
+                run = CustomerImport(chunk_size=options["chunk_size"], on_reject=on_reject, on_commit=on_commit)
+                stats = run.run(iter_records(f, fmt), resume=resume)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        finally:
+            if rejects_file:
+                rejects_file.close()
+
+        rate = stats["imported"] / stats["seconds"] if stats["seconds"] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['imported']} customers over {stats['days']} user-days "
+            f"in {stats['seconds']:.1f}s ({rate:,.0f} rows/s); {stats['rejected']} rows rejected."
+        ))
+        for reason, count in sorted(reasons.items(), key=lambda item: -item[1]):
+            self.stdout.write(f"  {count:>8}  {reason}")
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.benchmarks import parse_scales, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Time every page and the admin report on synthetic data at several "
+        "scales (in a throwaway test database) and write the query counts "
+        "and wall times to a JSON file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scales",
+            default="1x20,5x50",
+            help="Comma-separated <centers>x<users per center> (default: 1x20,5x50).",
+        )
+        parser.add_argument("--repeat", type=int, default=5, help="Warm runs per target (default: 5).")
+        parser.add_argument("--min-days", type=int, default=30, help="Shortest history in days (default: 30).")
+        parser.add_argument("--max-days", type=int, default=365, help="Longest history in days (default: 365).")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0).")
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=10,
+            help="Requests per WSGI-vs-ASGI burst (default: 10).",
+        )
+        parser.add_argument(
+            "--output", "-o",
+            default="benchmark_results.json",
+            help="Results file (default: benchmark_results.json).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            scales = parse_scales(options["scales"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        report = run_benchmarks(
+            scales,
+            repeat=options["repeat"],
+            output=options["output"],
+            min_days=options["min_days"],
+            max_days=options["max_days"],
+            seed=options["seed"],
+            concurrency=options["concurrency"],
+            log=self.stdout.write,
+        )
+
+        for scale in report["scales"]:
+            self.stdout.write(f"\n{scale['centers']} centers x {scale['users_per_center']} users")
+            for name, r in scale["results"].items():
+                self.stdout.write(
+                    f"  {name:<30} {r['status']!s:>4}  cold {r['cold_ms']:>9.2f} ms / {r['cold_queries']:>3} q"
+                    f"   warm {r['warm_ms_median'] or 0:>9.2f} ms / {r['warm_queries'] or 0:>3} q"
+                )
+            for name, c in scale["concurrent"].items():
+                self.stdout.write(
+                    f"  {c['requests']} x {name:<26} WSGI in a row {c['wsgi_ms']:>9.2f} ms"
+                    f"   ASGI gathered {c['asgi_ms']:>9.2f} ms"
+                )
+        self.stdout.write(self.style.SUCCESS(f"\nResults written to {options['output']}"))
@@ -0,0 +1,66 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.activity_logic import activity_status_from_counts, daily_counts_for_users
+from accounts.models import ActivitySnapshot
+from accounts.snapshots import SNAPSHOT_FIELDS, WINDOW_DAYS, replay_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Check every stored activity snapshot against a full 30-day replay "
+        "of the reference streak logic."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Overwrite mismatching snapshots with the replayed state.",
+        )
+
+    def handle(self, *args, **options):
+        by_day = defaultdict(list)
+        for snap in ActivitySnapshot.objects.select_related("user"):
+            by_day[snap.as_of].append(snap)
+
+        checked = 0
+        mismatched = []
+
+        for as_of, snaps in by_day.items():
+            dates, counts_by_user = daily_counts_for_users(
+                [s.user_id for s in snaps], days=WINDOW_DAYS, today=as_of
+            )
+            for snap in snaps:
+                checked += 1
+                counts = counts_by_user[snap.user_id]
+
+                # 1) what pages show must equal the reference logic
+                is_active, streak_dates, _, current_limit = activity_status_from_counts(dates, counts)
+                expected = (is_active, current_limit, streak_dates[0] if streak_dates else None)
+                actual = (snap.is_active, snap.current_limit, snap.streak_start)
+
+                # 2) the stored closed state must equal a fresh replay
+                fresh = ActivitySnapshot(user_id=snap.user_id)
+                replay_snapshot(fresh, as_of, dict(zip(dates, counts)))
+                fresh_fields = [getattr(fresh, f) for f in SNAPSHOT_FIELDS]
+                snap_fields = [getattr(snap, f) for f in SNAPSHOT_FIELDS]
+
+                if expected != actual or fresh_fields != snap_fields:
+                    mismatched.append((snap, fresh))
+                    self.stdout.write(
+                        f"MISMATCH {snap.user.username} as of {as_of}: "
+                        f"stored {actual}, replay {expected}"
+                    )
+
+        if mismatched and options["fix"]:
+            fixed = [fresh for _, fresh in mismatched]
+            for snap, fresh in mismatched:
+                fresh.pk = snap.pk
+            ActivitySnapshot.objects.bulk_update(fixed, SNAPSHOT_FIELDS)
+            self.stdout.write(self.style.WARNING(f"Fixed {len(fixed)} snapshots."))
+        elif mismatched:
+            raise CommandError(f"{len(mismatched)} of {checked} snapshots differ from a full replay.")
+
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} snapshots."))
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.26 on 2026-10-17 02:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_daily_counts(apps, schema_editor):
+    DailyCustomer = apps.get_model("accounts", "DailyCustomer")
+    DailyCount = apps.get_model("accounts", "DailyCount")
+
+    rows = (
+        DailyCustomer.objects
+        .order_by()
+        .values("user_id", "date")
+        .annotate(count=models.Count("id"))
+    )
+    DailyCount.objects.bulk_create(
+        [DailyCount(user_id=r["user_id"], date=r["date"], count=r["count"]) for r in rows],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0002_alter_profile_center_alter_profile_role'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dailycount',
+            constraint=models.UniqueConstraint(fields=('user', 'date'), name='dailycount_user_date_uniq'),
+        ),
+        migrations.RunPython(backfill_daily_counts, migrations.RunPython.noop),
+    ]
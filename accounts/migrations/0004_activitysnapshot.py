@@ -0,0 +1,32 @@
+# Generated by Django 4.2.26 on 2026-10-17 02:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0003_dailycount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivitySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateField()),
+                ('closed_limit', models.PositiveIntegerField(blank=True, null=True)),
+                ('closed_run', models.PositiveSmallIntegerField(default=0)),
+                ('closed_start', models.DateField(blank=True, null=True)),
+                ('last_bad_date', models.DateField(blank=True, null=True)),
+                ('today_count', models.PositiveIntegerField(default=0)),
+                ('is_active', models.BooleanField(default=False)),
+                ('current_limit', models.PositiveIntegerField(default=3)),
+                ('streak_start', models.DateField(blank=True, null=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='activity_snapshot', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.26 on 2026-10-17 02:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_activitysnapshot'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='dailycustomer',
+            options={},
+        ),
+        migrations.AddIndex(
+            model_name='dailycustomer',
+            index=models.Index(fields=['user', 'date'], name='dailycustomer_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['center', 'role'], name='profile_center_role_idx'),
+        ),
+    ]
@@ -0,0 +1,93 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# centers the signup page always offered, even before anyone picked them
+BASE_CENTERS = ["balasore", "bbsr", "basta"]
+
+
+def create_centers(apps, schema_editor):
+    Center = apps.get_model("accounts", "Center")
+    Profile = apps.get_model("accounts", "Profile")
+
+    codes = set(BASE_CENTERS)
+    codes |= {c for c in Profile.objects.values_list("center_text", flat=True).distinct() if c}
+
+    centers = {}
+    for code in sorted(codes):
+        centers[code] = Center.objects.create(code=code, name=code[:1].upper() + code[1:])
+
+    for profile in Profile.objects.all():
+        center = centers.get(profile.center_text) or centers[BASE_CENTERS[0]]
+        profile.center_ref = center
+        profile.save(update_fields=["center_ref"])
+        if profile.role == "centerowner" and center.owner_id is None:
+            center.owner_id = profile.user_id
+            center.save(update_fields=["owner"])
+
+
+def restore_center_text(apps, schema_editor):
+    Profile = apps.get_model("accounts", "Profile")
+    for profile in Profile.objects.select_related("center_ref"):
+        profile.center_text = profile.center_ref.code
+        profile.save(update_fields=["center_text"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0005_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Center',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=100, unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('owner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='owned_centers', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='profile',
+            name='profile_center_role_idx',
+        ),
+        migrations.RenameField(
+            model_name='profile',
+            old_name='center',
+            new_name='center_text',
+        ),
+        # nullable so the migration can be reversed (the column comes back empty first)
+        migrations.AlterField(
+            model_name='profile',
+            name='center_text',
+            field=models.CharField(max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='center_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='profiles', to='accounts.center'),
+        ),
+        migrations.RunPython(create_centers, restore_center_text),
+        migrations.RemoveField(
+            model_name='profile',
+            name='center_text',
+        ),
+        migrations.RenameField(
+            model_name='profile',
+            old_name='center_ref',
+            new_name='center',
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='center',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='profiles', to='accounts.center'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['center', 'role'], name='profile_center_role_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.26 on 2026-10-17 04:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_center'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['role', 'user'], name='profile_role_user_idx'),
+        ),
+    ]
@@ -2,6 +2,25 @@
 from django.db import models
 from django.contrib.auth.models import User
 
+class Center(models.Model):
+    """
+    A coaching center. `code` is the short name used in URLs and in the
+    signup password rule (the old free-text Profile.center value).
+    """
+    code = models.CharField(max_length=100, unique=True)
+    name = models.CharField(max_length=100)
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="owned_centers",
+    )
+
+    def __str__(self):
+        return self.name
+
+
 class Profile(models.Model):
     ROLE_CHOICES = [
         ("user", "User"),
@@ -10,11 +29,18 @@ class Profile(models.Model):
 
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES)
-    center = models.CharField(max_length=100)  # FREE TEXT, NO CHOICES
+    center = models.ForeignKey(Center, on_delete=models.PROTECT, related_name="profiles")
 
+    class Meta:
+        indexes = [
+            # (center, role) lookups: every dashboard filters on both
+            models.Index(fields=["center", "role"], name="profile_center_role_idx"),
+            # every user of a role (whole-report counts), without reading the table
+            models.Index(fields=["role", "user"], name="profile_role_user_idx"),
+        ]
 
     def __str__(self):
-        return f"{self.user.username} - {self.role} - {self.center}"
+        return f"{self.user.username} - {self.role} - {self.center.code}"
 
 
 class DailyCustomer(models.Model):
@@ -24,7 +50,56 @@ class DailyCustomer(models.Model):
     phone = models.CharField(max_length=20)
 
     class Meta:
-        ordering = ["date"]
+        # no default ordering: every query that needs one asks for it, and an
+        # implicit ORDER BY date would fight the (user, date) index
+        indexes = [
+            models.Index(fields=["user", "date"], name="dailycustomer_user_date_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.date} - {self.name}"
+
+
+class DailyCount(models.Model):
+    """
+    Per-user daily customer count (rollup of DailyCustomer).
+    Kept current by the write path in home_view; rebuild with
+    `python manage.py backfill_daily_counts`.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    date = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "date"], name="dailycount_user_date_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.date} - {self.count}"
+
+
+class ActivitySnapshot(models.Model):
+    """
+    Stored streak state per user, advanced day by day (see accounts/snapshots.py).
+
+    - closed_*: state after the 29 closed days before `as_of`
+    - is_active / current_limit / streak_start: state including `as_of` itself,
+      i.e. what compute_activity_status(user) returns on that day
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="activity_snapshot")
+    as_of = models.DateField()
+
+    closed_limit = models.PositiveIntegerField(null=True, blank=True)  # None = no running streak
+    closed_run = models.PositiveSmallIntegerField(default=0)
+    closed_start = models.DateField(null=True, blank=True)
+    last_bad_date = models.DateField(null=True, blank=True)  # latest bad closed day in the window
+
+    today_count = models.PositiveIntegerField(default=0)
+    is_active = models.BooleanField(default=False)
+    current_limit = models.PositiveIntegerField(default=3)
+    streak_start = models.DateField(null=True, blank=True)
+
+    def __str__(self):
+        status = "Active" if self.is_active else "Inactive"
+        return f"{self.user.username} - {self.as_of} - {status}"
@@ -0,0 +1,98 @@
+# accounts/query_plans.py
+
+import re
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.utils import timezone
+
+from .models import ActivitySnapshot, Center, DailyCount, DailyCustomer, Profile
+from .reports import report_counts_queryset, report_profiles
+from .views import center_summary_queries
+
+# SQLite: "SCAN accounts_profile" (but not "SCAN ... USING [COVERING] INDEX")
+# Postgres: "Seq Scan on accounts_profile"
+_SQLITE_SCAN = re.compile(r"\bSCAN (?:TABLE )?(\w+)(?!.*USING (?:COVERING )?INDEX)")
+_POSTGRES_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+def hot_queries():
+    """
+    (label, queryset) for the queries the dashboard, home and report pages run.
+    Values are placeholders: plans don't depend on them.
+    """
+    today = timezone.localdate()
+    start_30 = today - timedelta(days=29)
+    user_ids = [1, 2, 3]
+    summary_users, summary_totals = center_summary_queries(today)
+
+    return [
+        # home_view
+        ("home: today's count", DailyCustomer.objects.filter(user_id=1, date=today)),
+        ("home: customers for date", DailyCustomer.objects.filter(user_id=1, date=today).order_by("id")),
+        ("home: rollup row", DailyCount.objects.filter(user_id=1, date=today)),
+        ("home: streak counts", DailyCount.objects.filter(user_id=1, date__range=(start_30, today))),
+        ("home: snapshot", ActivitySnapshot.objects.filter(user_id__in=[1])),
+        # center dashboards
+        (
+            "dashboard: users page",
+            Profile.objects
+            .filter(center_id=1, role="user", user__username__gt="a")
+            .order_by("user__username")
+            .values_list("user_id", "user__username")[:51],
+        ),
+        (
+            "dashboard: users page search",
+            Profile.objects
+            .filter(center_id=1, role="user", user__username__icontains="a")
+            .order_by("user__username")
+            .values_list("user_id", "user__username")[:51],
+        ),
+        ("dashboard: counts for date", DailyCount.objects.filter(user_id__in=user_ids, date=today)),
+        ("dashboard: customers for user", DailyCustomer.objects.filter(user_id=1, date=today).order_by("id")),
+        ("dashboard: snapshots", ActivitySnapshot.objects.filter(user_id__in=user_ids)),
+        ("dashboard: window counts", DailyCount.objects.filter(user_id__in=user_ids, date__range=(start_30, today))),
+        # admin dashboard (the summary's own querysets) + signup
+        ("admin: center list", Center.objects.order_by("code").values_list("code", "name")),
+        ("admin: users per center", Profile.objects.filter(center_id=1, role="user")),
+        ("admin: summary users", summary_users),
+        ("admin: summary totals", summary_totals),
+        ("signup: center by code", Center.objects.filter(code="balasore", owner__isnull=False)),
+        ("signup: username taken", User.objects.filter(username="rahul")),
+        # admin_activity_report.py / activity export (report_counts' own querysets)
+        (
+            "report: user profiles",
+            report_profiles(),
+        ),
+        ("report: window counts", report_counts_queryset(start_30, today)),
+        ("report: window counts by center", report_counts_queryset(start_30, today, centers=["balasore"])),
+        ("report: window counts by chunk", report_counts_queryset(start_30, today, user_ids=user_ids)),
+    ]
+
+
+def full_scans(plan):
+    """Table names the plan reads with a full table scan."""
+    pattern = _POSTGRES_SCAN if connection.vendor == "postgresql" else _SQLITE_SCAN
+    return [m.group(1) for line in plan.splitlines() for m in [pattern.search(line)] if m]
+
+
+def check_query_plans(queries=None):
+    """
+    EXPLAIN every hot query. Returns [(label, plan, scanned_tables)] and
+    flags any query that falls back to a full table scan.
+    """
+    results = []
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            # small test tables make a seq scan "cheaper"; we want to know
+            # whether an index *can* be used
+            cursor.execute("SET enable_seqscan = off")
+
+        for label, qs in queries or hot_queries():
+            plan = qs.explain()
+            results.append((label, plan, full_scans(plan)))
+
+        if connection.vendor == "postgresql":
+            cursor.execute("RESET enable_seqscan")
+    return results
@@ -0,0 +1,218 @@
+# accounts/reports.py
+
+import csv
+import json
+from datetime import timedelta
+
+import numpy as np
+from django.db.models import Max
+from django.utils import timezone
+
+from .activity_matrix import evaluate_count_matrix
+from .db import read_db
+from .models import ActivitySnapshot, DailyCount, DailyCustomer, Profile
+
+REPORT_FIELDS = [
+    "Center",
+    "Username",
+    "Date",
+    "CallsThatDay",
+    "StatusLast7Days",
+    "CurrentLimit",
+]
+
+STATUS_DAYS = 30  # status is always judged on the 30 days ending at the report's end date
+
+
+def report_range(start=None, end=None):
+    """Default report range: the 30 days ending today."""
+    end = end or timezone.localdate()
+    start = start or end - timedelta(days=STATUS_DAYS - 1)
+    if start > end:
+        raise ValueError("start date is after end date")
+    return start, end
+
+
+def report_profiles(centers=None):
+    """
+    (user_id, center code, username) of every normal user, grouped by center
+    then ordered by username. `centers` are center codes.
+    Ordering on the center id keeps the walk on the (center, role) index.
+    """
+    qs = Profile.objects.using(read_db()).filter(role="user")
+    if centers:
+        qs = qs.filter(center__code__in=centers)
+    return qs.order_by("center_id", "user__username").values_list("user_id", "center__code", "user__username")
+
+
+def report_counts_queryset(start, end, centers=None, user_ids=None):
+    """(user_id, date, count) rows read by report_counts (also EXPLAINed by check_query_plans)."""
+    qs = DailyCount.objects.using(read_db()).filter(date__range=(start, end), user__profile__role="user")
+    if centers:
+        qs = qs.filter(user__profile__center__code__in=centers)
+    if user_ids is not None:
+        qs = qs.filter(user_id__in=user_ids)
+    return qs.values_list("user_id", "date", "count")
+
+
+def report_counts(start, end, centers=None, user_ids=None):
+    """
+    {user_id: {date: count}} for report users between start and end, one query.
+    Filters through the profile join, so no giant IN list is needed.
+    """
+    maps = {}
+    for uid, d, c in report_counts_queryset(start, end, centers, user_ids):
+        maps.setdefault(uid, {})[d] = c
+    return maps
+
+
+def _status_label(is_active):
+    return "Active" if is_active else "Inactive"
+
+
+def _rows_for(profiles, count_maps, start, end):
+    """Report rows for the given profiles, statuses from one vectorized pass."""
+    status_dates = [end - timedelta(days=i) for i in range(STATUS_DAYS - 1, -1, -1)]
+    matrix = np.array(
+        [[count_maps.get(uid, {}).get(d, 0) for d in status_dates] for uid, _, _ in profiles],
+        dtype=np.int64,
+    ).reshape(len(profiles), STATUS_DAYS)
+    is_active, current_limits, _ = evaluate_count_matrix(matrix)
+
+    dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    for i, (uid, center, username) in enumerate(profiles):
+        status = _status_label(is_active[i])
+        current_limit = int(current_limits[i])
+        counts = count_maps.get(uid, {})
+        for d in dates:
+            yield {
+                "Center": center,
+                "Username": username,
+                "Date": d.isoformat(),
+                "CallsThatDay": counts.get(d, 0),
+                "StatusLast7Days": status,
+                "CurrentLimit": current_limit,
+            }
+
+
+def build_report_rows(start=None, end=None, centers=None):
+    """
+    Whole report in a constant number of queries: one for the profiles
+    (joined with their user) and one for every count in the window.
+    """
+    start, end = report_range(start, end)
+    profiles = list(report_profiles(centers))
+    count_maps = report_counts(min(start, end - timedelta(days=STATUS_DAYS - 1)), end, centers)
+    return _rows_for(profiles, count_maps, start, end)
+
+
+def iter_report_rows(start=None, end=None, centers=None, chunk_size=500):
+    """
+    Same rows as `build_report_rows`, streamed with flat memory: profiles come
+    from a server-side cursor and counts are loaded per chunk of users.
+    """
+    start, end = report_range(start, end)
+    counts_from = min(start, end - timedelta(days=STATUS_DAYS - 1))
+    profiles = report_profiles(centers).iterator(chunk_size=chunk_size)
+
+    chunk = []
+    for profile in profiles:
+        chunk.append(profile)
+        if len(chunk) >= chunk_size:
+            yield from _chunk_rows(chunk, counts_from, start, end)
+            chunk = []
+    if chunk:
+        yield from _chunk_rows(chunk, counts_from, start, end)
+
+
+def _chunk_rows(chunk, counts_from, start, end):
+    count_maps = report_counts(counts_from, end, user_ids=[uid for uid, _, _ in chunk])
+    return _rows_for(chunk, count_maps, start, end)
+
+
+def report_rows_for(profiles, start, end):
+    """Rows of the given (user_id, center code, username) profiles only, one counts query."""
+    return _chunk_rows(profiles, min(start, end - timedelta(days=STATUS_DAYS - 1)), start, end)
+
+
+def report_watermark():
+    """
+    High-water marks of the rows a report was built from: the last
+    DailyCustomer id and the last Profile id. Take it before reading the
+    report rows, so anything written meanwhile is picked up by the next refresh.
+    """
+    db = read_db()
+    return {
+        "customer_id": DailyCustomer.objects.using(db).aggregate(last=Max("id"))["last"] or 0,
+        "profile_id": Profile.objects.using(db).aggregate(last=Max("id"))["last"] or 0,
+    }
+
+
+def snapshot_statuses(day, centers=None):
+    """
+    {user_id: (status, current limit)} of the report users whose activity
+    snapshot is on `day`, in one query: the status a report ending on `day`
+    shows. Users without such a snapshot are left out.
+    """
+    qs = ActivitySnapshot.objects.using(read_db()).filter(as_of=day, user__profile__role="user")
+    if centers:
+        qs = qs.filter(user__profile__center__code__in=centers)
+    return {
+        uid: (_status_label(is_active), limit)
+        for uid, is_active, limit in qs.values_list("user_id", "is_active", "current_limit")
+    }
+
+
+def touched_report_users(watermark, start, end, centers=None):
+    """
+    Ids of the report users whose rows may differ from a report built at
+    `watermark`: customers added since on a date the report reads, or a new
+    profile. Both are range scans on the primary key.
+    """
+    db = read_db()
+    customers = DailyCustomer.objects.using(db).filter(
+        id__gt=watermark["customer_id"],
+        date__range=(min(start, end - timedelta(days=STATUS_DAYS - 1)), end),
+        user__profile__role="user",
+    )
+    profiles = Profile.objects.using(db).filter(id__gt=watermark["profile_id"], role="user")
+    if centers:
+        customers = customers.filter(user__profile__center__code__in=centers)
+        profiles = profiles.filter(center__code__in=centers)
+    return set(customers.order_by().values_list("user_id", flat=True).distinct()) | set(
+        profiles.values_list("user_id", flat=True)
+    )
+
+
+class _Echo:
+    """File-like object whose write() just hands the line back (for csv.writer)."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv_lines(rows):
+    writer = csv.DictWriter(_Echo(), fieldnames=REPORT_FIELDS)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(row) + "\n"
+
+
+REPORT_FORMATS = {
+    # format: (line generator, content type, file extension)
+    "csv": (iter_csv_lines, "text/csv", "csv"),
+    "jsonl": (iter_jsonl_lines, "application/x-ndjson", "jsonl"),
+}
+
+
+def write_report(path, rows, fmt="csv"):
+    """Write report `rows` to the file at `path` in one of REPORT_FORMATS; returns `path`."""
+    iter_lines = REPORT_FORMATS[fmt][0]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        f.writelines(iter_lines(rows))
+    return path
@@ -0,0 +1,110 @@
+# accounts/rollups.py
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .dashboard_cache import bump_user_center_version
+from .models import ActivitySnapshot, DailyCount, DailyCustomer
+from .snapshots import WINDOW_DAYS, record_today_count
+
+MIN_NEW_DAY = 3
+MAX_PER_DAY = 25
+
+
+class DailyLimitError(ValueError):
+    """A batch of customers would break the per-day rules."""
+
+
+def add_customers(user, day, customers):
+    """
+    Save a batch of (name, phone) pairs for `day` in one transaction and
+    return the new total for that day.
+
+    Rules (same as the home page form):
+      - a new day needs at least MIN_NEW_DAY customers
+      - never more than MAX_PER_DAY customers in one day
+
+    The (user, day) DailyCount row is checked and bumped with a single
+    conditional UPDATE, so two concurrent submissions cannot both pass the
+    cap; the customer rows and the activity snapshot are written in the
+    same transaction, and the center's dashboard cache is invalidated once
+    it commits.
+
+    The transaction opens with a write (INSERT OR IGNORE of the day's row):
+    on SQLite, a transaction that reads first cannot upgrade to a write
+    lock while another writer holds it and fails at once with "database is
+    locked", whereas a first write waits out busy_timeout.
+    """
+    n = len(customers)
+
+    with transaction.atomic():
+        DailyCount.objects.bulk_create([DailyCount(user=user, date=day)], ignore_conflicts=True)
+
+        row = DailyCount.objects.filter(user=user, date=day, count__lte=MAX_PER_DAY - n)
+        if n < MIN_NEW_DAY:
+            row = row.filter(count__gt=0)
+
+        if not row.update(count=F("count") + n):
+            existing = DailyCount.objects.get(user=user, date=day).count
+            if existing + n > MAX_PER_DAY:
+                raise DailyLimitError(f"You cannot have more than {MAX_PER_DAY} customers in one day.")
+            raise DailyLimitError(f"You must add at least {MIN_NEW_DAY} customers for a new day.")
+
+        DailyCustomer.objects.bulk_create(
+            DailyCustomer(user=user, date=day, name=name, phone=phone)
+            for name, phone in customers
+        )
+        snapshot = record_today_count(user, day)
+        transaction.on_commit(lambda: bump_user_center_version(user.pk))
+
+    return snapshot.today_count
+
+
+def rebuild_daily_counts(batch_size=2000):
+    """
+    Recompute the whole DailyCount table from raw DailyCustomer rows.
+    Returns the number of rollup rows written.
+    """
+    qs = (
+        DailyCustomer.objects
+        .order_by()
+        .values("user_id", "date")
+        .annotate(count=Count("id"))
+    )
+
+    written = 0
+    with transaction.atomic():
+        DailyCount.objects.all().delete()
+
+        batch = []
+        for row in qs.iterator(chunk_size=batch_size):
+            batch.append(DailyCount(user_id=row["user_id"], date=row["date"], count=row["count"]))
+            if len(batch) >= batch_size:
+                DailyCount.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            DailyCount.objects.bulk_create(batch)
+            written += len(batch)
+
+    return written
+
+
+def recount_daily_count(user_id, day):
+    """
+    Bring the (user, day) rollup row back in line with the DailyCustomer
+    rows after one of them was saved or deleted on its own (admin edits).
+    A snapshot whose window holds `day` is dropped and replayed on next
+    read, as the importer does.
+    """
+    count = DailyCustomer.objects.filter(user_id=user_id, date=day).count()
+    if count:
+        DailyCount.objects.update_or_create(user_id=user_id, date=day, defaults={"count": count})
+    else:
+        DailyCount.objects.filter(user_id=user_id, date=day).delete()
+
+    if day >= timezone.localdate() - timedelta(days=WINDOW_DAYS - 1):
+        ActivitySnapshot.objects.filter(user_id=user_id).delete()
@@ -0,0 +1,83 @@
+# accounts/signals.py
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .center_directory import invalidate_center_directory
+from .dashboard_cache import bump_center_version, bump_user_center_version, bump_user_version
+from .db import configure_connection
+from .models import Center, DailyCustomer, Profile
+from .rollups import recount_daily_count
+
+
+# Note: bulk_create() sends no signals; add_customers() and the importer
+# keep the rollup, the snapshots and the versions current themselves.
+
+@receiver(pre_save, sender=DailyCustomer)
+def remember_old_day(sender, instance, **kwargs):
+    if instance.pk:
+        instance._old_day = (
+            DailyCustomer.objects.filter(pk=instance.pk).values_list("user_id", "date").first()
+        )
+
+
+def _origin_model(origin):
+    """Model that delete() was called on (`origin` is an instance or a queryset)."""
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+@receiver(post_save, sender=DailyCustomer)
+@receiver(post_delete, sender=DailyCustomer)
+def daily_customer_changed(sender, instance, created=False, **kwargs):
+    day = (instance.user_id, instance.date)
+    old_day = getattr(instance, "_old_day", None)
+    if kwargs["signal"] is post_delete:
+        origin = kwargs["origin"]
+        if _origin_model(origin) is User:
+            return  # the user's DailyCount rows and snapshot are deleted with it
+        # a queryset delete sends one signal per row once all the rows are
+        # gone: recount each day the first time it comes up
+        seen = vars(origin).setdefault("_deleted_days", set())
+        if day in seen:
+            return
+        seen.add(day)
+    if kwargs["signal"] is post_delete or created or old_day != day:
+        # a row saved or deleted on its own (admin): recount its day(s)
+        for user_id, date in {day, old_day} - {None}:
+            recount_daily_count(user_id, date)
+    for user_id in {day[0], old_day[0] if old_day else None} - {None}:
+        transaction.on_commit(lambda user_id=user_id: bump_user_center_version(user_id))
+
+
+@receiver(pre_save, sender=Profile)
+def remember_old_center(sender, instance, **kwargs):
+    if instance.pk:
+        instance._old_center = (
+            Profile.objects.filter(pk=instance.pk).values_list("center_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def profile_changed(sender, instance, **kwargs):
+    centers = {instance.center_id, getattr(instance, "_old_center", None)}
+    for center in centers:
+        transaction.on_commit(lambda center=center: bump_center_version(center))
+    transaction.on_commit(lambda: bump_user_version(instance.user_id))
+
+
+@receiver(post_save, sender=Center)
+@receiver(post_delete, sender=Center)
+def center_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {"owner"}:
+        return  # the directory only lists codes and names
+    transaction.on_commit(invalidate_center_directory)
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    configure_connection(connection)
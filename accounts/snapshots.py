@@ -0,0 +1,217 @@
+# accounts/snapshots.py
+
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .activity_logic import streak_step
+from .models import ActivitySnapshot, DailyCount, Profile
+
+WINDOW_DAYS = 30
+
+SNAPSHOT_FIELDS = [
+    "as_of",
+    "closed_limit",
+    "closed_run",
+    "closed_start",
+    "last_bad_date",
+    "today_count",
+    "is_active",
+    "current_limit",
+    "streak_start",
+]
+
+
+def _is_bad(count):
+    return count < 3 or count >= 25
+
+
+def _count_maps(user_ids, start_date, end_date):
+    """{user_id: {date: count}} for the given users and date range, one query (on the primary)."""
+    qs = (
+        DailyCount.objects.using("default")
+        .filter(user_id__in=user_ids, date__range=(start_date, end_date))
+        .values_list("user_id", "date", "count")
+    )
+    maps = {}
+    for uid, d, c in qs:
+        maps.setdefault(uid, {})[d] = c
+    return maps
+
+
+def _apply_today(snap, today_count):
+    """Fill the fields that include `as_of` from the closed state + today's count."""
+    closed = (snap.closed_limit, snap.closed_run, snap.closed_start)
+    limit, _, start = streak_step(closed, snap.as_of, today_count)
+
+    snap.today_count = today_count
+    snap.is_active = limit is not None
+    snap.current_limit = limit if limit is not None else 3
+    snap.streak_start = start
+
+
+def _set_closed(snap, today, state, last_bad):
+    snap.as_of = today
+    snap.closed_limit, snap.closed_run, snap.closed_start = state
+    snap.last_bad_date = last_bad
+
+
+def replay_snapshot(snap, today, count_map):
+    """Rebuild `snap` for `today` by replaying the whole window (the slow, exact path)."""
+    state = (None, 0, None)
+    last_bad = None
+    for i in range(WINDOW_DAYS - 1, 0, -1):
+        d = today - timedelta(days=i)
+        c = count_map.get(d, 0)
+        state = streak_step(state, d, c)
+        if _is_bad(c):
+            last_bad = d
+
+    _set_closed(snap, today, state, last_bad)
+    _apply_today(snap, count_map.get(today, 0))
+
+
+def advance_snapshot(snap, today, count_map):
+    """
+    Move `snap` forward to `today` using only the days it has not seen yet.
+
+    The stored state was replayed from an older window start. After a bad day
+    the streak no longer depends on where the window started, so the result
+    is exact as long as a bad day falls inside the new window. Returns False
+    (leaving `snap` untouched) when a full replay is needed instead.
+    """
+    state = (snap.closed_limit, snap.closed_run, snap.closed_start)
+    last_bad = snap.last_bad_date
+
+    d = snap.as_of
+    while d < today:
+        c = count_map.get(d, 0)
+        state = streak_step(state, d, c)
+        if _is_bad(c):
+            last_bad = d
+        d += timedelta(days=1)
+
+    window_start = today - timedelta(days=WINDOW_DAYS - 1)
+    if last_bad is None or last_bad < window_start:
+        return False
+
+    _set_closed(snap, today, state, last_bad)
+    _apply_today(snap, count_map.get(today, 0))
+    return True
+
+
+def refresh_snapshots(users, today=None):
+    """
+    Bring the snapshots of `users` up to `today` and return {user_id: snapshot}.
+
+    - up-to-date snapshots: one indexed read for everyone
+    - snapshots from an earlier day: advanced with the days they missed
+    - missing ones (or too old / not advanceable / from a later day):
+      full replay from DailyCount
+
+    Snapshots and counts are read from the primary even inside
+    replica_reads(): the snapshots are written back there, and advancing one
+    from a lagging replica would overwrite what record_today_count just wrote.
+    """
+    today = today or timezone.localdate()
+    window_start = today - timedelta(days=WINDOW_DAYS - 1)
+    user_ids = [getattr(u, "pk", u) for u in users]
+
+    snaps = {s.user_id: s for s in ActivitySnapshot.objects.using("default").filter(user_id__in=user_ids)}
+
+    stale = [s for s in snaps.values() if s.as_of < today]
+    advanceable = [s for s in stale if s.as_of >= window_start]
+    replay_ids = [uid for uid in user_ids if uid not in snaps]
+    replay_ids += [
+        s.user_id for s in snaps.values()
+        if s.as_of < window_start or s.as_of > today
+    ]
+
+    to_update = []
+    if advanceable:
+        since = min(s.as_of for s in advanceable)
+        counts = _count_maps([s.user_id for s in advanceable], since, today)
+        for snap in advanceable:
+            if advance_snapshot(snap, today, counts.get(snap.user_id, {})):
+                to_update.append(snap)
+            else:
+                replay_ids.append(snap.user_id)
+
+    to_create = []
+    if replay_ids:
+        counts = _count_maps(replay_ids, window_start, today)
+        for uid in replay_ids:
+            snap = snaps.get(uid) or ActivitySnapshot(user_id=uid)
+            replay_snapshot(snap, today, counts.get(uid, {}))
+            (to_update if snap.pk else to_create).append(snap)
+            snaps[uid] = snap
+
+    if to_update:
+        ActivitySnapshot.objects.bulk_update(to_update, SNAPSHOT_FIELDS)
+    if to_create:
+        # another request may have created the same snapshot meanwhile
+        ActivitySnapshot.objects.bulk_create(to_create, ignore_conflicts=True)
+
+    return snaps
+
+
+def refresh_stale_snapshots(today=None, batch_size=500):
+    """
+    Advance every normal user's snapshot that is not on `today` yet.
+    One query when nothing is stale (e.g. after close_activity_day ran).
+    """
+    today = today or timezone.localdate()
+    stale_ids = list(
+        Profile.objects
+        .filter(role="user")
+        .exclude(user__activity_snapshot__as_of=today)
+        .values_list("user_id", flat=True)
+    )
+    for i in range(0, len(stale_ids), batch_size):
+        refresh_snapshots(stale_ids[i:i + batch_size], today=today)
+    return len(stale_ids)
+
+
+def record_today_count(user, today=None):
+    """
+    Re-apply today's count to the user's snapshot after customers are saved.
+    Call inside the same transaction as the DailyCount update.
+    """
+    today = today or timezone.localdate()
+    snap = refresh_snapshots([user], today=today)[user.pk]
+
+    count = (
+        DailyCount.objects
+        .filter(user=user, date=today)
+        .values_list("count", flat=True)
+        .first()
+    ) or 0
+    if count == snap.today_count:
+        return snap
+
+    _apply_today(snap, count)
+    ActivitySnapshot.objects.filter(user=user).update(
+        **{f: getattr(snap, f) for f in SNAPSHOT_FIELDS}
+    )
+    return snap
+
+
+def snapshot_activity_status(user, today=None):
+    """
+    Same return value as compute_activity_status(user), read from the snapshot.
+    Only the streak rows themselves (at most 30) are loaded, and only when active.
+    """
+    today = today or timezone.localdate()
+    snap = refresh_snapshots([user], today=today)[user.pk]
+    if not snap.is_active:
+        return False, [], [], 3
+
+    count_map = dict(
+        DailyCount.objects
+        .filter(user=user, date__range=(snap.streak_start, today))
+        .values_list("date", "count")
+    )
+    days = (today - snap.streak_start).days + 1
+    streak_dates = [snap.streak_start + timedelta(days=i) for i in range(days)]
+    streak_counts = [count_map.get(d, 0) for d in streak_dates]
+    return True, streak_dates, streak_counts, snap.current_limit
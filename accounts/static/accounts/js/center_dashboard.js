@@ -0,0 +1,37 @@
+// center_dashboard.html: load a user's customers for the selected date only when asked for.
+(function() {
+  const table = document.querySelector('.excel-table');
+  if (!table) return;
+  const url = table.dataset.customersUrl;
+  const selectedDate = table.dataset.date;
+
+  function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+  }
+
+  document.querySelectorAll('.show-customers-btn').forEach(function(btn) {
+    btn.addEventListener('click', function() {
+      const slot = btn.nextElementSibling;
+      btn.disabled = true;
+      const params = new URLSearchParams({user: btn.dataset.username, date: selectedDate});
+      fetch(url + '?' + params.toString(), {credentials: 'same-origin'})
+        .then(function(resp) { return resp.json(); })
+        .then(function(data) {
+          const rows = (data.customers || []).map(function(c) {
+            return '<tr><td>' + escapeHtml(c.name) + '</td><td>' + escapeHtml(c.phone) + '</td></tr>';
+          }).join('');
+          slot.innerHTML =
+            '<table class="table table-borderless table-sm mb-0">' +
+            '<thead><tr><th style="width:50%;">Name</th><th style="width:50%;">Phone</th></tr></thead>' +
+            '<tbody>' + rows + '</tbody></table>';
+          btn.remove();
+        })
+        .catch(function() {
+          btn.disabled = false;
+          slot.textContent = 'Could not load customers.';
+        });
+    });
+  });
+})();
@@ -0,0 +1,23 @@
+// home.html: add another customer row (max 25 per day).
+(function() {
+  const addBtn = document.getElementById('add-more-btn');
+  const container = document.getElementById('customers-container');
+  if (addBtn && container) {
+    addBtn.addEventListener('click', function() {
+      const rows = container.getElementsByClassName('customer-row').length;
+      if (rows >= 25) return;
+      const num = rows + 1;
+      const wrapper = document.createElement('div');
+      wrapper.className = 'row g-2 mb-2 customer-row';
+      wrapper.innerHTML = `
+        <div class="col-6">
+          <input type="text" name="customer_name" class="form-control" placeholder="Customer ${num} name" required />
+        </div>
+        <div class="col-6">
+          <input type="text" name="customer_phone" class="form-control" placeholder="Customer ${num} phone" required />
+        </div>
+      `;
+      container.appendChild(wrapper);
+    });
+  }
+})();
@@ -0,0 +1,9 @@
+// signup.html: show / hide the "new center" input.
+function toggleNewCenterInput() {
+  const div = document.getElementById("new-center-wrapper");
+  if (div.style.display === "none" || div.style.display === "") {
+    div.style.display = "block";
+  } else {
+    div.style.display = "none";
+  }
+}
@@ -0,0 +1,129 @@
+# accounts/synthetic.py
+"""
+Synthetic data at production-like scale (local benchmarking only).
+
+Everything is written with bulk_create, so no signals fire: the center
+directory is invalidated once at the end and activity snapshots are built
+lazily by the views, as for any user who has not been seen today.
+"""
+
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .center_directory import invalidate_center_directory
+from .models import Center, DailyCount, DailyCustomer, Profile
+from .rollups import MAX_PER_DAY, MIN_NEW_DAY
+
+SYNTHETIC_PASSWORD = "synthetic"
+
+
+def _user_history(rng, days, today):
+    """
+    [(date, count)] for one user: a history of `days` days ending today.
+    Each user has their own habit: how often they skip a day and how much
+    their daily count drifts, so streaks of every length show up.
+    """
+    skip_rate = rng.choice([0.02, 0.05, 0.1, 0.25, 0.5])
+    drift = rng.choice([0, 1, 2, 4])
+    count = rng.randint(MIN_NEW_DAY, 10)
+
+    history = []
+    for i in range(days - 1, -1, -1):
+        if rng.random() < skip_rate:
+            continue
+        count = min(MAX_PER_DAY - 1, max(MIN_NEW_DAY, count + rng.randint(-drift, drift)))
+        history.append((today - timedelta(days=i), count))
+    return history
+
+
+def generate_dataset(
+    centers,
+    users_per_center,
+    min_days=30,
+    max_days=365,
+    seed=0,
+    prefix="synth",
+    customers=True,
+    today=None,
+    batch_size=5000,
+):
+    """
+    Create `centers` centers (one owner each) with `users_per_center` users,
+    each with a 30-365 day customer history ending today.
+
+    Returns {"centers", "users", "customers", "daily_counts"} row counts.
+    Raises ValueError if centers with the same prefix already exist.
+    """
+    if not 1 <= min_days <= max_days:
+        raise ValueError("need 1 <= min_days <= max_days")
+    if Center.objects.filter(code__startswith=f"{prefix}-").exists():
+        raise ValueError(f"centers with prefix {prefix!r} already exist")
+
+    rng = random.Random(seed)
+    today = today or timezone.localdate()
+    password = make_password(SYNTHETIC_PASSWORD)
+    stats = {"centers": centers, "users": 0, "customers": 0, "daily_counts": 0}
+
+    with transaction.atomic():
+        center_objs = Center.objects.bulk_create([
+            Center(code=f"{prefix}-{c:03d}", name=f"Synthetic {c:03d}") for c in range(centers)
+        ])
+        center_objs = list(Center.objects.filter(code__startswith=f"{prefix}-").order_by("code"))
+
+        owners = User.objects.bulk_create([
+            User(username=f"{center.code}-owner", password=password) for center in center_objs
+        ])
+        users = User.objects.bulk_create([
+            User(username=f"{center.code}-u{u:05d}", password=password)
+            for center in center_objs
+            for u in range(users_per_center)
+        ])
+        # SQLite/Postgres hand back primary keys from bulk_create; fetch them
+        # again anyway so other backends work too
+        ids = dict(
+            User.objects
+            .filter(username__startswith=f"{prefix}-")
+            .values_list("username", "id")
+        )
+
+        profiles = [
+            Profile(user_id=ids[owner.username], role="centerowner", center=center)
+            for owner, center in zip(owners, center_objs)
+        ]
+        profiles += [
+            Profile(user_id=ids[user.username], role="user", center=center_objs[i // users_per_center])
+            for i, user in enumerate(users)
+        ]
+        Profile.objects.bulk_create(profiles, batch_size=batch_size)
+        for owner, center in zip(owners, center_objs):
+            center.owner_id = ids[owner.username]
+        Center.objects.bulk_update(center_objs, ["owner"])
+        stats["users"] = len(users)
+
+        counts, rows = [], []
+        for user in users:
+            uid = ids[user.username]
+            for day, count in _user_history(rng, rng.randint(min_days, max_days), today):
+                counts.append(DailyCount(user_id=uid, date=day, count=count))
+                if customers:
+                    rows.extend(
+                        DailyCustomer(user_id=uid, date=day, name=f"Customer {n + 1}", phone=f"9{rng.randrange(10**9):09d}")
+                        for n in range(count)
+                    )
+            if len(counts) >= batch_size:
+                stats["daily_counts"] += len(DailyCount.objects.bulk_create(counts))
+                counts = []
+            if len(rows) >= batch_size:
+                stats["customers"] += len(DailyCustomer.objects.bulk_create(rows, batch_size=batch_size))
+                rows = []
+        stats["daily_counts"] += len(DailyCount.objects.bulk_create(counts))
+        stats["customers"] += len(DailyCustomer.objects.bulk_create(rows, batch_size=batch_size))
+
+        transaction.on_commit(invalidate_center_directory)
+
+    return stats
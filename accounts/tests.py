@@ -1 +1,1114 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, connections, router
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.db.models import Q
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+import numpy as np
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .access import SESSION_KEY as ACCESS_SESSION_KEY, Access, ProfileBackend, get_access
+from .activity_logic import (
+    activity_status_from_counts,
+    compute_activity_status,
+    compute_activity_status_bulk,
+)
+from .activity_matrix import evaluate_count_matrix
+from .activity_sql import annotate_activity_status, center_active_users, compute_activity_status_sql
+from .api import admin_center_dashboard_api_view
+from .benchmarks import compare_sqlite_modes, parse_scales, run_in_threads, sqlite_file_database
+from .center_directory import DIRECTORY_TTL
+from .db import enable_sqlite_wal, replica_reads
+from .importer import CustomerImport, iter_records
+from .instrumentation import QueryBudgetExceeded
+from .models import ActivitySnapshot, Center, DailyCount, DailyCustomer, Profile
+from .query_plans import check_query_plans, full_scans
+from .reports import build_report_rows, iter_report_rows
+from .rollups import DailyLimitError, add_customers, rebuild_daily_counts
+from .snapshots import refresh_snapshots, snapshot_activity_status
+from .synthetic import generate_dataset
+from .trends import center_trends, trend_from_counts, user_trends
+from .views import _build_center_summaries
+
+
+def make_user(username, center="balasore", role="user"):
+    user = User.objects.create_user(username=username, password="x")
+    center_obj, _ = Center.objects.get_or_create(code=center, defaults={"name": center.capitalize()})
+    Profile.objects.create(user=user, role=role, center=center_obj)
+    return user
+
+
+def log_pattern(user, pattern):
+    """
+    pattern example: [3, 3, 4, 4, 4, 4, 4, 4]
+    Simulates the LAST len(pattern) days of activity (newest last).
+    """
+    today = timezone.localdate()
+    rows = []
+    for i, c in enumerate(reversed(pattern)):
+        d = today - timedelta(days=i)
+        rows += [
+            DailyCustomer(user=user, date=d, name=f"Test{i}", phone="000")
+            for _ in range(c)
+        ]
+    DailyCustomer.objects.bulk_create(rows)
+    DailyCount.objects.bulk_create(
+        DailyCount(user=user, date=today - timedelta(days=i), count=c)
+        for i, c in enumerate(reversed(pattern))
+        if c
+    )
+
+
+class ActivityStatusBulkTests(TestCase):
+    PATTERNS = {
+        "empty": [],
+        "steady": [3, 3, 4, 4, 4, 4, 4, 4],
+        "too_long_same": [5] * 9,
+        "drop": [3, 4, 5, 6, 4, 4],
+        "bad_day": [4, 5, 6, 1, 3, 4],
+        "over_cap": [3, 4, 25, 3, 3],
+    }
+
+    def setUp(self):
+        self.users = []
+        for name, pattern in self.PATTERNS.items():
+            user = make_user(name)
+            log_pattern(user, pattern)
+            self.users.append(user)
+
+    def test_bulk_matches_single_user(self):
+        bulk = compute_activity_status_bulk(self.users)
+        for user in self.users:
+            self.assertEqual(bulk[user.pk], compute_activity_status(user), user.username)
+
+    def test_bulk_uses_one_query(self):
+        with self.assertNumQueries(1):
+            compute_activity_status_bulk(self.users)
+
+
+class DailyCountRollupTests(TestCase):
+    def setUp(self):
+        self.user = make_user("rahul")
+        self.client.force_login(self.user)
+
+    def post_customers(self, n):
+        return self.client.post("/home/", {
+            "customer_name": [f"c{i}" for i in range(n)],
+            "customer_phone": [f"{i}" for i in range(n)],
+        })
+
+    def counts(self):
+        return dict(DailyCount.objects.filter(user=self.user).values_list("date", "count"))
+
+    def test_home_post_updates_rollup(self):
+        self.post_customers(3)
+        self.post_customers(2)
+        row = DailyCount.objects.get(user=self.user, date=timezone.localdate())
+        self.assertEqual(row.count, 5)
+
+    def test_rejected_post_leaves_rollup_alone(self):
+        self.post_customers(2)
+        self.assertFalse(DailyCount.objects.exists())
+
+    def test_backfill_matches_raw_rows(self):
+        log_pattern(self.user, [3, 0, 7, 4])
+        DailyCount.objects.all().delete()
+        call_command("backfill_daily_counts", stdout=StringIO())
+        self.assertEqual(
+            sorted(DailyCount.objects.values_list("count", flat=True)),
+            [3, 4, 7],
+        )
+        self.assertEqual(rebuild_daily_counts(), 3)
+
+    def test_single_row_edits_keep_rollup(self):
+        # what the admin does: create / move / delete one customer at a time
+        today = timezone.localdate()
+        log_pattern(self.user, [3, 4])
+        refresh_snapshots([self.user])
+
+        customer = DailyCustomer.objects.create(user=self.user, date=today, name="x", phone="1")
+        self.assertEqual(self.counts()[today], 5)
+        self.assertFalse(ActivitySnapshot.objects.filter(user=self.user).exists())
+
+        customer.date = today - timedelta(days=3)
+        customer.save()
+        self.assertEqual(self.counts(), {today - timedelta(days=3): 1, today - timedelta(days=1): 3, today: 4})
+        customer.name = "renamed"
+        customer.save()
+        customer.delete()
+        self.assertEqual(self.counts(), {today - timedelta(days=1): 3, today: 4})
+        self.assertTrue(snapshot_activity_status(self.user)[0])
+
+
+    def test_deletes_recount_each_day_once(self):
+        today = timezone.localdate()
+        log_pattern(self.user, [5, 0, 6])
+        with CaptureQueriesContext(connection) as ctx:
+            DailyCustomer.objects.filter(user=self.user, date__gt=today - timedelta(days=2)).delete()
+        recounts = [q for q in ctx.captured_queries if q["sql"].startswith("SELECT COUNT(*)")]
+        self.assertEqual(len(recounts), 1)
+        self.assertEqual(self.counts(), {today - timedelta(days=2): 5})
+
+        # deleting the user takes its rollup rows along: nothing to recount
+        asha = make_user("asha")
+        log_pattern(asha, [7] * 10)
+        asha_id = asha.pk
+        with CaptureQueriesContext(connection) as ctx:
+            asha.delete()
+        self.assertFalse([q for q in ctx.captured_queries if q["sql"].startswith("SELECT COUNT(*)")])
+        self.assertFalse(DailyCount.objects.filter(user_id=asha_id).exists())
+
+
+class ActivitySnapshotTests(TestCase):
+    PATTERNS = ActivityStatusBulkTests.PATTERNS
+
+    def setUp(self):
+        self.users = []
+        for name, pattern in self.PATTERNS.items():
+            user = make_user(name)
+            log_pattern(user, pattern)
+            self.users.append(user)
+
+    def test_snapshot_matches_replay(self):
+        for user in self.users:
+            self.assertEqual(snapshot_activity_status(user), compute_activity_status(user), user.username)
+
+    def test_fresh_snapshots_are_one_query(self):
+        refresh_snapshots(self.users)
+        with self.assertNumQueries(1):
+            refresh_snapshots(self.users)
+
+    def test_stale_snapshots_advance_to_today(self):
+        today = timezone.localdate()
+        for days_ago in (6, 3, 1):
+            refresh_snapshots(self.users, today=today - timedelta(days=days_ago))
+            for user in self.users:
+                snap = ActivitySnapshot.objects.get(user=user)
+                is_active, _, _, limit = compute_activity_status(user, today=snap.as_of)
+                self.assertEqual((snap.is_active, snap.current_limit), (is_active, limit))
+
+        snaps = refresh_snapshots(self.users)
+        for user in self.users:
+            is_active, _, _, limit = compute_activity_status(user)
+            self.assertEqual((snaps[user.pk].is_active, snaps[user.pk].current_limit), (is_active, limit))
+
+    def test_refresh_stays_on_the_primary_under_replica_reads(self):
+        # "replica" is not among this test's databases: a read routed there fails
+        today = timezone.localdate()
+        refresh_snapshots(self.users, today=today - timedelta(days=1))
+        with self.settings(DATABASE_READ_ALIAS="replica"), replica_reads():
+            snaps = refresh_snapshots(self.users)
+        self.assertEqual({snap.as_of for snap in snaps.values()}, {today})
+
+    def test_home_post_updates_snapshot(self):
+        user = make_user("fresh")
+        refresh_snapshots([user])
+        self.client.force_login(user)
+        self.client.post("/home/", {"customer_name": ["a", "b", "c"], "customer_phone": ["1", "2", "3"]})
+        snap = ActivitySnapshot.objects.get(user=user)
+        self.assertEqual((snap.today_count, snap.is_active, snap.current_limit), (3, True, 3))
+
+    def test_verify_command(self):
+        refresh_snapshots(self.users)
+        call_command("verify_activity_snapshots", stdout=StringIO())
+
+        ActivitySnapshot.objects.filter(user=self.users[1]).update(is_active=False)
+        with self.assertRaises(CommandError):
+            call_command("verify_activity_snapshots", stdout=StringIO())
+        call_command("verify_activity_snapshots", "--fix", stdout=StringIO())
+        call_command("verify_activity_snapshots", stdout=StringIO())
+
+
+# value pools that hit bad days, drops, increases and long flat runs;
+# every streak backend is checked against activity_status_from_counts on them
+STREAK_CORPUS_POOLS = [
+    [0, 3, 4, 5, 25],
+    [3, 4],
+    [5],
+    [3, 4, 5, 6],
+    [2, 3, 24, 25],
+    list(range(0, 30)),
+]
+
+
+class CountMatrixPropertyTests(SimpleTestCase):
+    """The numpy evaluator must agree with the scalar logic on any pattern."""
+
+    def test_matches_scalar_on_random_patterns(self):
+        rng = np.random.default_rng(2024)
+        dates = list(range(30))
+        for pool in STREAK_CORPUS_POOLS:
+            matrix = rng.choice(pool, size=(500, 30))
+            is_active, limits, starts = evaluate_count_matrix(matrix)
+            for i, row in enumerate(matrix.tolist()):
+                active, streak_dates, _, limit = activity_status_from_counts(dates, row)
+                expected = (active, limit, streak_dates[0] if streak_dates else -1)
+                self.assertEqual((bool(is_active[i]), int(limits[i]), int(starts[i])), expected, row)
+
+    def test_empty_inputs(self):
+        is_active, limits, starts = evaluate_count_matrix(np.zeros((0, 30)))
+        self.assertEqual(len(is_active), 0)
+        is_active, limits, starts = evaluate_count_matrix(np.zeros((2, 0)))
+        self.assertEqual(limits.tolist(), [3, 3])
+
+
+class SqlActivityStatusTests(TestCase):
+    """The window-function backend must agree with the Python reference."""
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = np.random.default_rng(2025)
+        cls.today = timezone.localdate()
+        dates = [cls.today - timedelta(days=29 - i) for i in range(30)]
+        patterns = {
+            f"p{p}-{n:02d}": pattern
+            for p, pool in enumerate(STREAK_CORPUS_POOLS)
+            for n, pattern in enumerate(rng.choice(pool, size=(40, 30)).tolist())
+        }
+        # hand-written edge cases: flat for exactly 7 / 8 / 15 days, then a gap
+        patterns.update({"flat7": [4] * 7, "flat8": [4] * 8, "flat15": [4] * 15, "gap": [4, 5, 0, 5]})
+
+        # no password hashing for a few hundred users
+        cls.users = User.objects.bulk_create([User(username=name) for name in patterns])
+        center = Center.objects.get_or_create(code="balasore", defaults={"name": "Balasore"})[0]
+        Profile.objects.bulk_create([Profile(user=user, role="user", center=center) for user in cls.users])
+        DailyCount.objects.bulk_create(
+            DailyCount(user=user, date=d, count=c)
+            for user in cls.users
+            for d, c in zip(dates[-len(patterns[user.username]):], patterns[user.username])
+            if c
+        )
+
+    def test_matches_python_reference(self):
+        expected = compute_activity_status_bulk(self.users, today=self.today)
+        with self.assertNumQueries(1):
+            actual = compute_activity_status_sql(self.users, today=self.today)
+        for user in self.users:
+            self.assertEqual(actual[user.pk], expected[user.pk], user.username)
+        self.assertTrue(any(status[0] for status in actual.values()))
+
+    def test_filter_and_order_by_status_in_sql(self):
+        expected = compute_activity_status_bulk(self.users, today=self.today)
+        center_id = Center.objects.get(code="balasore").pk
+        active = set(
+            Profile.objects
+            .filter(center_id=center_id, user_id__in=center_active_users(center_id, today=self.today))
+            .values_list("user_id", flat=True)
+        )
+        self.assertEqual(active, {uid for uid, status in expected.items() if status[0]})
+
+        ordered = list(
+            annotate_activity_status(Profile.objects.filter(center_id=center_id), center_id, today=self.today)
+            .order_by("-sql_is_active", "user__username")
+            .values_list("user_id", "sql_is_active")
+        )
+        self.assertEqual([uid for uid, is_active in ordered if is_active], [uid for uid, _ in ordered[:len(active)]])
+        self.assertEqual({uid for uid, is_active in ordered if is_active}, active)
+
+
+class QueryPlanTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        for label, plan, scanned in check_query_plans():
+            self.assertEqual(scanned, [], f"{label}:\n{plan}")
+
+    def test_full_scan_detection(self):
+        self.assertEqual(full_scans("3 0 0 SCAN accounts_profile"), ["accounts_profile"])
+        self.assertEqual(full_scans("3 0 0 SCAN accounts_profile USING COVERING INDEX idx"), [])
+        self.assertEqual(full_scans("3 0 0 SEARCH accounts_profile USING INDEX idx (center=?)"), [])
+
+
+class AddCustomersTests(TestCase):
+    def setUp(self):
+        self.user = make_user("rahul")
+        self.today = timezone.localdate()
+
+    def batch(self, n):
+        return [(f"c{i}", f"{i}") for i in range(n)]
+
+    def test_new_day_needs_three(self):
+        with self.assertRaisesMessage(DailyLimitError, "at least 3"):
+            add_customers(self.user, self.today, self.batch(2))
+        self.assertFalse(DailyCount.objects.exists())
+        self.assertEqual(add_customers(self.user, self.today, self.batch(3)), 3)
+        self.assertEqual(add_customers(self.user, self.today, self.batch(1)), 4)
+
+    def test_cap_is_checked_against_committed_total(self):
+        add_customers(self.user, self.today, self.batch(20))
+        # another submission landed in between: the conditional update sees it
+        DailyCount.objects.filter(user=self.user).update(count=24)
+        with self.assertRaisesMessage(DailyLimitError, "more than 25"):
+            add_customers(self.user, self.today, self.batch(2))
+        self.assertEqual(DailyCustomer.objects.filter(user=self.user).count(), 20)
+
+    def test_batch_is_a_single_insert(self):
+        with CaptureQueriesContext(connection) as ctx:
+            add_customers(self.user, self.today, self.batch(25))
+        inserts = [q for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "accounts_dailycustomer"')]
+        self.assertEqual(len(inserts), 1)
+
+    def test_concurrent_batches_on_a_sqlite_file(self):
+        # real concurrent writers need a database file: the test database is
+        # in memory and this test's rows sit in a transaction nobody else sees
+        with tempfile.TemporaryDirectory() as tmp:
+            for wal in (False, True):
+                db = sqlite_file_database(os.path.join(tmp, f"wal-{wal}.sqlite3"))
+                if wal:
+                    run_in_threads(db, [lambda: enable_sqlite_wal(connection)])
+                [users] = run_in_threads(db, [lambda: [make_user(f"u{i}") for i in range(8)]])
+                start = threading.Barrier(16)
+
+                def submit(user):
+                    start.wait()
+                    return add_customers(user, self.today, self.batch(3))
+
+                totals = run_in_threads(db, [lambda user=user: submit(user) for user in users * 2])
+                self.assertEqual([t for t in totals if isinstance(t, Exception)], [], f"wal={wal}")
+                self.assertEqual(sorted(totals), [3] * 8 + [6] * 8)
+                [counts] = run_in_threads(db, [lambda: list(DailyCount.objects.values_list("count", flat=True))])
+                self.assertEqual(counts, [6] * 8)
+
+
+class CenterDashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(5):
+            log_pattern(make_user(f"user{i}"), [3, 4, i + 3])
+        log_pattern(make_user("other", center="bbsr"), [3])
+        self.owner = make_user("owner", role="centerowner")
+        self.client.force_login(self.owner)
+
+    def usernames(self, response):
+        return [u["username"] for u in response.context["users_data"]]
+
+    @patch("accounts.views.DASHBOARD_PAGE_SIZE", 2)
+    def test_keyset_pages(self):
+        first = self.client.get("/center-dashboard/")
+        self.assertEqual(self.usernames(first), ["user0", "user1"])
+        self.assertIsNone(first.context["prev_before"])
+
+        second = self.client.get("/center-dashboard/", {"after": first.context["next_after"]})
+        self.assertEqual(self.usernames(second), ["user2", "user3"])
+
+        last = self.client.get("/center-dashboard/", {"after": second.context["next_after"]})
+        self.assertEqual(self.usernames(last), ["user4"])
+        self.assertIsNone(last.context["next_after"])
+
+        back = self.client.get("/center-dashboard/", {"before": last.context["prev_before"]})
+        self.assertEqual(self.usernames(back), ["user2", "user3"])
+
+    def test_rows_carry_counts_not_customers(self):
+        response = self.client.get("/center-dashboard/")
+        row = response.context["users_data"][2]
+        self.assertEqual(row, {"username": "user2", "status": "Active", "count": 5})
+
+    def test_status_filter(self):
+        log_pattern(make_user("idle"), [4, 5, 1])
+        inactive = self.client.get("/center-dashboard/", {"status": "inactive"})
+        self.assertEqual(self.usernames(inactive), ["idle"])
+        self.assertEqual(inactive.context["status"], "inactive")
+        self.assertContains(inactive, "&range=180&status=inactive")  # the trend range links keep the filter
+        active = self.client.get("/center-dashboard/", {"status": "active"})
+        self.assertEqual(self.usernames(active), [f"user{i}" for i in range(5)])
+        self.assertEqual(len(self.usernames(self.client.get("/center-dashboard/", {"status": "bogus"}))), 6)
+
+    def test_customers_endpoint(self):
+        today = timezone.localdate().isoformat()
+        data = self.client.get("/center-dashboard/customers/", {"user": "user1", "date": today}).json()
+        self.assertEqual(len(data["customers"]), 4)
+
+        other = self.client.get("/center-dashboard/customers/", {"user": "other", "date": today})
+        self.assertEqual(other.status_code, 403)
+
+
+class DashboardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user("asha")
+        self.client.force_login(make_user("owner", role="centerowner"))
+
+    def check_cached_until_write(self):
+        self.client.get("/center-dashboard/")
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/center-dashboard/")
+        self.assertFalse([q for q in ctx.captured_queries if "accounts_dailycount" in q["sql"]])
+        self.assertEqual(response.context["users_data"][0]["count"], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            add_customers(self.user, timezone.localdate(), [("a", "1"), ("b", "2"), ("c", "3")])
+        response = self.client.get("/center-dashboard/")
+        self.assertEqual(response.context["users_data"][0]["count"], 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_user("bina")
+        response = self.client.get("/center-dashboard/")
+        self.assertEqual(len(response.context["users_data"]), 2)
+
+    def test_locmem_backend(self):
+        self.check_cached_until_write()
+
+    def test_file_backend(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            backend = {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": tmp}
+            with self.settings(CACHES={"default": backend}):
+                self.check_cached_until_write()
+
+
+class CenterSummaryTests(TestCase):
+    def setUp(self):
+        for i, pattern in enumerate([[3, 4, 5], [3], [], [6]]):
+            log_pattern(make_user(f"b{i}", center="balasore"), pattern)
+        log_pattern(make_user("k0", center="bbsr"), [4, 4])
+        make_user("owner", center="basta", role="centerowner")
+        call_command("close_activity_day", stdout=StringIO())
+
+    def test_summary_rows(self):
+        rows = {r["code"]: r for r in _build_center_summaries(timezone.localdate())}
+        self.assertEqual(
+            rows["balasore"],
+            {"code": "balasore", "name": "Balasore", "users": 4, "active": 3, "inactive": 1, "today_total": 14, "total_30": 21},
+        )
+        self.assertEqual(rows["bbsr"]["active"], 1)
+        self.assertEqual(rows["basta"]["users"], 0)
+
+    def test_stale_snapshots_count_inactive(self):
+        today = timezone.localdate()
+        ActivitySnapshot.objects.filter(user__username="b0").update(as_of=today - timedelta(days=1))
+        ActivitySnapshot.objects.filter(user__username="k0").delete()
+        with self.assertNumQueries(2):  # nothing is refreshed on the request path
+            rows = {r["code"]: r for r in _build_center_summaries(today)}
+        self.assertEqual((rows["balasore"]["active"], rows["bbsr"]["active"]), (2, 0))
+
+        call_command("close_activity_day", stdout=StringIO())
+        rows = {r["code"]: r for r in _build_center_summaries(today)}
+        self.assertEqual((rows["balasore"]["active"], rows["bbsr"]["active"]), (3, 1))
+
+    def test_constant_queries(self):
+        today = timezone.localdate()
+        _build_center_summaries(today)
+        for i in range(10):
+            log_pattern(make_user(f"x{i}", center=f"new{i}"), [3])
+        with self.assertNumQueries(2):
+            _build_center_summaries(today)
+
+
+class ReportRowsTests(TestCase):
+    def setUp(self):
+        for i in range(5):
+            log_pattern(make_user(f"u{i}", center=f"c{i % 2}"), [3, 4, 5, i])
+
+    def test_constant_queries(self):
+        with self.assertNumQueries(2):
+            rows = list(build_report_rows())
+        self.assertEqual(len(rows), 5 * 30)
+        self.assertEqual(rows, list(iter_report_rows(chunk_size=2)))
+
+    def test_filters(self):
+        end = timezone.localdate()
+        rows = list(build_report_rows(start=end - timedelta(days=2), end=end, centers=["c1"]))
+        self.assertEqual({r["Username"] for r in rows}, {"u1", "u3"})
+        self.assertEqual([r["CallsThatDay"] for r in rows if r["Username"] == "u3"], [4, 5, 3])
+        self.assertTrue(all(r["StatusLast7Days"] == "Active" for r in rows if r["Username"] == "u3"))
+
+    def test_sharded_report_matches_one_pass(self):
+        # the report script sits next to manage.py
+        from admin_activity_report import build_admin_report, build_sharded_report, parse_args
+
+        make_user("owner-only", center="empty", role="centerowner")  # a center without report rows
+        with tempfile.TemporaryDirectory() as tmp, redirect_stdout(StringIO()):
+            for fmt in ("csv", "jsonl"):
+                one_pass = build_admin_report(output=os.path.join(tmp, f"one.{fmt}"), fmt=fmt)
+                sharded = build_sharded_report(output=os.path.join(tmp, f"sharded.{fmt}"), fmt=fmt, workers=1)
+                with open(one_pass, encoding="utf-8") as a, open(sharded, encoding="utf-8") as b:
+                    self.assertEqual(a.read(), b.read(), fmt)
+            # part files are cleaned up
+            self.assertEqual(
+                sorted(os.listdir(tmp)),
+                ["one.csv", "one.csv.watermark.json", "one.jsonl", "one.jsonl.watermark.json",
+                 "sharded.csv", "sharded.jsonl"],
+            )
+        self.assertEqual(parse_args(["--workers", "4"]).workers, 4)
+
+    def test_refresh_patches_touched_users(self):
+        from admin_activity_report import build_admin_report, parse_args, read_watermark
+
+        with tempfile.TemporaryDirectory() as tmp, redirect_stdout(StringIO()) as out:
+            for fmt in ("csv", "jsonl"):
+                report, rebuilt = os.path.join(tmp, f"report.{fmt}"), os.path.join(tmp, f"full.{fmt}")
+                build_admin_report(output=report, fmt=fmt)
+                mark = read_watermark(report)
+                self.assertEqual(mark["customer_id"], DailyCustomer.objects.latest("id").id)
+
+                # nothing new: watermark queries, touched users, profiles to check the file, no rows read
+                with self.assertNumQueries(5):
+                    build_admin_report(output=report, fmt=fmt)
+
+                add_customers(User.objects.get(username="u1"), timezone.localdate(), [("n", "1")])
+                log_pattern(make_user("u0b", center="c0"), [3, 3])  # new user, in the middle of c0
+                with self.assertNumQueries(6):
+                    build_admin_report(output=report, fmt=fmt)
+                build_admin_report(output=rebuilt, fmt=fmt, full=True)
+                with open(report, encoding="utf-8") as a, open(rebuilt, encoding="utf-8") as b:
+                    self.assertEqual(a.read(), b.read(), fmt)
+                self.assertGreater(read_watermark(report)["customer_id"], mark["customer_id"])
+                User.objects.filter(username="u0b").delete()
+            self.assertIn("(2 users recomputed)", out.getvalue())
+        self.assertTrue(parse_args(["--full"]).full)
+
+    def assert_refresh_matches_full(self, build, tmp, fmt, **kwargs):
+        report, rebuilt = os.path.join(tmp, f"report.{fmt}"), os.path.join(tmp, f"full.{fmt}")
+        build(output=report, fmt=fmt, **kwargs)
+        build(output=rebuilt, fmt=fmt, full=True, **kwargs)
+        with open(report, encoding="utf-8") as a, open(rebuilt, encoding="utf-8") as b:
+            body = a.read()
+            self.assertEqual(body, b.read(), fmt)
+        return body
+
+    def test_refresh_follows_moved_and_deleted_users(self):
+        from admin_activity_report import build_admin_report
+
+        with tempfile.TemporaryDirectory() as tmp, redirect_stdout(StringIO()):
+            for fmt in ("csv", "jsonl"):
+                build_admin_report(output=os.path.join(tmp, f"report.{fmt}"), fmt=fmt)
+                # no new customers: only the profiles changed
+                Profile.objects.filter(user__username="u1").update(center=Center.objects.get(code="c0"))
+                self.assertIn("u1", self.assert_refresh_matches_full(build_admin_report, tmp, fmt))
+                User.objects.filter(username="u3").delete()
+                self.assertNotIn("u3", self.assert_refresh_matches_full(build_admin_report, tmp, fmt))
+                Profile.objects.filter(user__username="u1").update(center=Center.objects.get(code="c1"))
+                make_user("u3", center="c1")
+
+    def test_refresh_shifts_the_window(self):
+        from admin_activity_report import build_admin_report
+
+        today = timezone.localdate()
+        refresh_snapshots(User.objects.exclude(username="u4"), today=today)
+        with tempfile.TemporaryDirectory() as tmp, redirect_stdout(StringIO()) as out:
+            for fmt in ("csv", "jsonl"):
+                yesterday = {"start": today - timedelta(days=30), "end": today - timedelta(days=1)}
+                build_admin_report(output=os.path.join(tmp, f"report.{fmt}"), fmt=fmt, **yesterday)
+                # the default range a day later: u4 has no snapshot for today
+                self.assert_refresh_matches_full(build_admin_report, tmp, fmt)
+            self.assertEqual(out.getvalue().count("(1 users recomputed, 1 new days)"), 2)
+
+
+class ActivityExportTests(TestCase):
+    def setUp(self):
+        for name, pattern in [("asha", [3, 4, 5]), ("bina", [])]:
+            log_pattern(make_user(name), pattern)
+        make_user("owner", role="centerowner")
+        self.admin = User.objects.create_superuser("admin", password="x")
+
+    def export(self, **params):
+        self.client.force_login(self.admin)
+        response = self.client.get("/activity-export/", params)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_csv_export(self):
+        response, body = self.export()
+        lines = body.splitlines()
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(lines[0], "Center,Username,Date,CallsThatDay,StatusLast7Days,CurrentLimit")
+        self.assertEqual(len(lines), 1 + 2 * 30)
+        self.assertTrue(lines[30].endswith(",5,Active,5"))
+
+    def test_jsonl_export(self):
+        _, body = self.export(format="jsonl")
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual({r["Username"] for r in rows}, {"asha", "bina"})
+
+    def test_superuser_only(self):
+        self.client.force_login(User.objects.get(username="asha"))
+        self.assertRedirects(self.client.get("/activity-export/"), "/home/", fetch_redirect_response=False)
+
+
+class CenterSignupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def signup(self, email, password, role, **extra):
+        data = {"email": email, "password": password, "confirm_password": password, "role": role}
+        data.update(extra)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post("/", data)
+
+    def test_owner_adds_center(self):
+        response = self.signup("ravi@x.com", "rav", "centerowner", new_center_name="cuttack")
+        self.assertEqual(response.status_code, 302)
+        center = Center.objects.get(code="cuttack")
+        self.assertEqual((center.name, center.owner.username), ("Cuttack", "ravi"))
+
+        self.client.logout()
+        self.signup("asha@x.com", "ash@cuttack", "user", center="cuttack")
+        self.assertEqual(Profile.objects.get(user__username="asha").center, center)
+
+    def test_user_needs_existing_center(self):
+        response = self.signup("asha@x.com", "ash@nowhere", "user", center="nowhere")
+        self.assertContains(response, "Select a center")
+        self.assertFalse(Center.objects.filter(code="nowhere").exists())
+
+    def test_one_owner_per_center(self):
+        make_user("first", center="bbsr", role="centerowner")
+        Center.objects.filter(code="bbsr").update(owner=User.objects.get(username="first"))
+        response = self.signup("ravi@x.com", "rav", "centerowner", center="bbsr")
+        self.assertContains(response, "Center owner already exists")
+
+    def test_directory_cached_until_center_added(self):
+        self.client.get("/")
+        with self.assertNumQueries(0):
+            response = self.client.get("/")
+        self.assertNotIn("puri", dict(response.context["centers"]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Center.objects.create(code="puri", name="Puri")
+        with self.assertNumQueries(1):
+            response = self.client.get("/")
+        self.assertIn(("puri", "Puri"), response.context["centers"])
+
+    def test_directory_expires_without_shared_invalidation(self):
+        self.client.get("/")
+        Center.objects.bulk_create([Center(code="puri", name="Puri")])  # no signal, as on another worker
+        self.assertNotIn("puri", dict(self.client.get("/").context["centers"]))
+
+        later = time.monotonic() + DIRECTORY_TTL
+        with patch("accounts.center_directory.time.monotonic", return_value=later):
+            response = self.client.get("/")
+        self.assertIn(("puri", "Puri"), response.context["centers"])
+
+
+class JsonApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.asha = make_user("asha")
+        log_pattern(self.asha, [3, 4, 5])
+        make_user("bina")
+        self.owner = make_user("owner", role="centerowner")
+
+    def test_home_json_and_304(self):
+        self.client.force_login(self.asha)
+        response = self.client.get("/api/home/")
+        data = response.json()
+        self.assertEqual((data["center"]["code"], data["count"]), ("balasore", 5))
+        self.assertEqual([day["count"] for day in data["status"]["streak"]], [3, 4, 5])
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith('"'))
+
+        with patch("accounts.api.snapshot_activity_status") as status:
+            unchanged = self.client.get("/api/home/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(unchanged.status_code, 304)
+        status.assert_not_called()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            add_customers(self.asha, timezone.localdate(), [("Cust", "1")])
+        changed = self.client.get("/api/home/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.json()["count"], 6)
+
+        # a write whose version bump this process never sees (another worker, unshared cache)
+        add_customers(self.asha, timezone.localdate(), [("Cust", "2")])
+        self.assertEqual(self.client.get("/api/home/", HTTP_IF_NONE_MATCH=changed["ETag"]).status_code, 200)
+
+    def test_center_dashboard_json_and_304(self):
+        self.client.force_login(self.owner)
+        response = self.client.get("/api/center-dashboard/")
+        users = {u["username"]: u for u in response.json()["users"]}
+        self.assertEqual(users["asha"], {"username": "asha", "status": "Active", "count": 5})
+        self.assertEqual(users["bina"]["status"], "Inactive")
+
+        etag = response["ETag"]
+        self.assertEqual(self.client.get("/api/center-dashboard/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        other_date = self.client.get("/api/center-dashboard/", {"date": "2020-01-01"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(other_date.status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            add_customers(User.objects.get(username="bina"), timezone.localdate(), [("a", "1")] * 3)
+        changed = self.client.get("/api/center-dashboard/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+
+        add_customers(self.asha, timezone.localdate(), [("b", "2")])  # no version bump seen here
+        fresh = self.client.get("/api/center-dashboard/", HTTP_IF_NONE_MATCH=changed["ETag"])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual({u["username"]: u["count"] for u in fresh.json()["users"]}["asha"], 6)  # not the cached page
+
+    def test_permissions(self):
+        self.client.force_login(self.asha)
+        self.assertEqual(self.client.get("/api/center-dashboard/").status_code, 403)
+        self.client.force_login(self.owner)
+        self.assertEqual(self.client.get("/api/home/").status_code, 403)
+
+        # admin routes only exist with DEBUG on, so call the view directly
+        request = RequestFactory().get("/api/admin-dashboard/balasore/")
+        request.user = User.objects.create_superuser("admin", password="x")
+        response = admin_center_dashboard_api_view(request, center_code="balasore")
+        self.assertEqual(json.loads(response.content)["center"]["name"], "Balasore")
+        self.assertEqual(admin_center_dashboard_api_view(request, center_code="nowhere").status_code, 404)
+
+
+class DatabaseRoutingTests(SimpleTestCase):
+    def test_dashboard_reads_go_to_read_alias(self):
+        with self.settings(DATABASE_READ_ALIAS="replica"):
+            self.assertEqual(router.db_for_read(DailyCount), "default")
+            with replica_reads():
+                self.assertEqual(router.db_for_read(DailyCount), "replica")
+                self.assertEqual(router.db_for_read(User), "default")  # auth stays on the primary
+                self.assertEqual(router.db_for_write(DailyCount), "default")
+        with replica_reads():
+            self.assertEqual(router.db_for_read(DailyCount), "default")  # no read alias configured
+
+    def test_replica_mirrors_test_database(self):
+        self.assertEqual(connections["replica"].settings_dict["NAME"], connection.settings_dict["NAME"])
+
+    def test_sqlite_wal_is_switched_on_explicitly(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            settings_dict = {**connection.settings_dict, "NAME": f"{tmp}/probe.sqlite3"}
+            probe = SQLiteDatabaseWrapper(settings_dict, alias="probe")
+            with probe.cursor() as cursor:
+                cursor.execute("PRAGMA busy_timeout")
+                self.assertEqual(cursor.fetchone()[0], 5000)
+                cursor.execute("PRAGMA journal_mode")
+                self.assertEqual(cursor.fetchone()[0], "delete")  # opening a connection leaves the file alone
+
+            self.assertEqual(enable_sqlite_wal(probe), "wal")
+            probe.close()
+            probe = SQLiteDatabaseWrapper(settings_dict, alias="probe")
+            with probe.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode")
+                self.assertEqual(cursor.fetchone()[0], "wal")
+                cursor.execute("PRAGMA synchronous")
+                self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            probe.close()
+
+    def test_sqlite_mode_comparison_runs(self):
+        # smoke test only: the throughput comparison itself belongs to run_benchmarks
+        result = compare_sqlite_modes(writers=2, readers=1, seconds=0.5, centers=1, users_per_center=4)
+        self.assertEqual(set(result), {"default", "wal"})
+        self.assertEqual(set(result["wal"]), set(result["default"]))
+        for mode in result.values():
+            self.assertGreater(mode["writes"], 0)
+            self.assertEqual(mode["errors"], 0)  # writers wait for the lock (see add_customers)
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user("asha")
+        log_pattern(self.user, [3, 4])
+        self.client.force_login(self.user)
+
+    def test_server_timing_and_log_line(self):
+        with self.assertLogs("accounts.metrics", "INFO") as logs:
+            response = self.client.get("/home/")
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+, view;dur=[\d.]+$')
+        line = json.loads(logs.records[-1].getMessage())
+        self.assertEqual((line["url_name"], line["status"]), ("home", 200))
+        self.assertGreater(line["queries"], 0)
+        self.assertGreater(line["template_ms"], 0)
+
+    def test_query_budget(self):
+        with self.settings(QUERY_BUDGETS={"home": 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get("/home/")
+            with self.settings(QUERY_BUDGET_RAISE=False), self.assertLogs("accounts.metrics", "WARNING"):
+                self.assertEqual(self.client.get("/home/").status_code, 200)
+
+
+class AccessTests(TestCase):
+    def setUp(self):
+        self.asha = make_user("asha")
+        self.owner = make_user("owner", role="centerowner")
+        make_user("other-owner", center="puri", role="centerowner")
+
+    def test_backend_loads_profile_and_center_with_user(self):
+        backend = ProfileBackend()
+        user = backend.get_user(self.owner.pk)
+        with self.assertNumQueries(0):
+            access = Access.for_user(user)
+        self.assertEqual((access.role, access.center_code, access.center_name), ("centerowner", "balasore", "Balasore"))
+        self.assertEqual(access.landing, "center_dashboard")
+
+    def test_login_routes_by_role_and_keeps_access_in_session(self):
+        response = self.client.post("/center-login/", {"username": "owner", "password": "x"})
+        self.assertRedirects(response, "/center-dashboard/", fetch_redirect_response=False)
+        self.assertEqual(self.client.session[ACCESS_SESSION_KEY]["center_code"], "balasore")
+
+        response = self.client.post("/login/", {"username": "owner", "password": "x"})
+        self.assertIn("Center Owner login page", response.context["error"])
+        response = self.client.post("/center-login/", {"username": "asha", "password": "x"})
+        self.assertIn("not a Center Owner", response.context["error"])
+
+    def test_sessions_signed_in_with_model_backend_stay_valid(self):
+        # sessions from before ProfileBackend was configured
+        self.client.force_login(self.asha, backend="django.contrib.auth.backends.ModelBackend")
+        self.assertEqual(self.client.get("/home/").status_code, 200)
+
+    def test_session_copy_used_without_joined_profile(self):
+        request = RequestFactory().get("/")
+        request.user = User.objects.get(pk=self.asha.pk)  # profile not loaded
+        request.session = {ACCESS_SESSION_KEY: Access.for_user(self.asha).as_dict()}
+        with self.assertNumQueries(0):
+            access = get_access(request)
+        self.assertEqual((access.role, access.center_code), ("user", "balasore"))
+
+    def test_center_customers_limited_to_own_center(self):
+        self.client.force_login(User.objects.get(username="other-owner"))
+        response = self.client.get("/center-dashboard/customers/", {"user": "asha", "date": "2024-01-01"})
+        self.assertEqual(response.status_code, 403)
+        self.client.force_login(self.owner)
+        response = self.client.get("/center-dashboard/customers/", {"user": "asha", "date": "2024-01-01"})
+        self.assertEqual(response.status_code, 200)
+
+
+class SyntheticDataTests(TestCase):
+    def test_generated_histories_follow_the_rules(self):
+        stats = generate_dataset(2, 3, min_days=30, max_days=60, seed=1, prefix="t")
+        self.assertEqual((stats["centers"], stats["users"]), (2, 6))
+        self.assertEqual(Center.objects.filter(code__startswith="t-", owner__isnull=False).count(), 2)
+        self.assertEqual(Profile.objects.filter(center__code="t-001", role="user").count(), 3)
+
+        counts = DailyCount.objects.filter(user__username__startswith="t-")
+        self.assertEqual(counts.count(), stats["daily_counts"])
+        self.assertFalse(counts.filter(Q(count__lt=3) | Q(count__gte=25)).exists())
+        self.assertEqual(sum(counts.values_list("count", flat=True)), stats["customers"])
+        self.assertEqual(DailyCustomer.objects.count(), stats["customers"])
+
+    def test_command_refuses_existing_prefix(self):
+        call_command("generate_synthetic_data", centers=1, users=1, max_days=30, stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command("generate_synthetic_data", centers=1, users=1, max_days=30, stdout=StringIO())
+
+    def test_parse_scales(self):
+        self.assertEqual(parse_scales("1x10, 5x50"), [(1, 10), (5, 50)])
+        with self.assertRaises(ValueError):
+            parse_scales("5by50")
+
+
+class CustomerImportTests(TestCase):
+    def setUp(self):
+        self.asha = make_user("asha")
+        self.today = timezone.localdate()
+        self.day = (self.today - timedelta(days=40)).isoformat()
+
+    def csv_file(self, rows):
+        lines = ["username,date,name,phone"] + [",".join(row) for row in rows]
+        return StringIO("\n".join(lines) + "\n")
+
+    def test_batches_follow_the_day_rules(self):
+        old_day = (self.today - timedelta(days=41)).isoformat()
+        rows = [("asha", self.day, f"c{i}", str(i)) for i in range(4)]
+        rows += [("asha", old_day, "x", "1"), ("asha", old_day, "y", "2")]  # too few for a new day
+        rows += [("nobody", self.day, "z", "3"), ("asha", "yesterday", "z", "3")]
+        rejected = []
+
+        run = CustomerImport(chunk_size=3, on_reject=lambda n, reason, r: rejected.append((n, reason)))
+        stats = run.run(iter_records(self.csv_file(rows), "csv"))
+
+        self.assertEqual((stats["imported"], stats["rejected"], stats["days"]), (4, 4, 1))
+        self.assertEqual(DailyCount.objects.get(user=self.asha).count, 4)
+        self.assertEqual(DailyCustomer.objects.filter(user=self.asha).count(), 4)
+        self.assertEqual(
+            sorted(rejected),
+            [(5, "fewer than 3 customers for a new day"), (6, "fewer than 3 customers for a new day"),
+             (7, "unknown username"), (8, "date must be YYYY-MM-DD")],
+        )
+
+    def test_cap_counts_stored_customers(self):
+        log_pattern(self.asha, [24])
+        today = self.today.isoformat()
+        lines = [json.dumps({"username": "asha", "date": today, "name": f"c{i}", "phone": "1"}) for i in range(2)]
+        stats = CustomerImport().run(iter_records(StringIO("\n".join(lines)), "jsonl"))
+        self.assertEqual((stats["imported"], stats["rejected"]), (0, 2))
+        self.assertEqual(DailyCount.objects.get(user=self.asha).count, 24)
+
+    def test_import_and_home_page_add_to_the_same_day(self):
+        # concurrent writers need a database file (see AddCustomersTests)
+        with tempfile.TemporaryDirectory() as tmp:
+            db = sqlite_file_database(os.path.join(tmp, "db.sqlite3"))
+            [asha] = run_in_threads(db, [lambda: make_user("asha")])
+            start = threading.Barrier(6)
+
+            def import_batch(i):
+                rows = [("asha", self.today.isoformat(), f"i{i}-{n}", "1") for n in range(3)]
+                start.wait()
+                return CustomerImport().run(iter_records(self.csv_file(rows), "csv"))["imported"]
+
+            def submit(i):
+                start.wait()
+                return add_customers(asha, self.today, [(f"h{i}-{n}", "1") for n in range(3)])
+
+            results = run_in_threads(
+                db, [lambda i=i: import_batch(i) for i in range(3)] + [lambda i=i: submit(i) for i in range(3)]
+            )
+            self.assertEqual([r for r in results if isinstance(r, Exception)], [])
+            [counts] = run_in_threads(db, [lambda: (DailyCount.objects.get().count, DailyCustomer.objects.count())])
+            self.assertEqual(counts, (18, 18))
+
+    def test_recent_history_drops_stale_snapshot(self):
+        refresh_snapshots([self.asha])
+        days = [(self.today - timedelta(days=d)).isoformat() for d in (1, 0)]
+        rows = [("asha", day, f"c{i}", "1") for day in days for i in range(3)]
+        CustomerImport().run(iter_records(self.csv_file(rows), "csv"))
+        self.assertFalse(ActivitySnapshot.objects.filter(user=self.asha).exists())
+        self.assertEqual(snapshot_activity_status(self.asha)[2], [3, 3])
+
+    def test_command_resumes_from_checkpoint(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f"{tmp}/log.csv"
+            rows = [("asha", self.day, f"c{i}", str(i)) for i in range(3)]
+            with open(path, "w") as f:
+                f.write(self.csv_file(rows).getvalue())
+
+            call_command("import_customers", path, stdout=StringIO())
+            with open(f"{path}.checkpoint") as f:
+                self.assertEqual(json.load(f)["last_record"], 3)
+
+            call_command("import_customers", path, resume=True, stdout=StringIO())
+            self.assertEqual(DailyCustomer.objects.filter(user=self.asha).count(), 3)
+
+    def test_resume_after_read_ahead_rejects(self):
+        other_day = (self.today - timedelta(days=39)).isoformat()
+        rows = [("asha", self.day, f"c{i}", "1") for i in range(3)]
+        rows += [("nobody", self.day, "z", "1")]  # rejected while the first batch is still open
+        rows += [("asha", other_day, f"d{i}", "1") for i in range(3)]
+        rejected, checkpoints = [], []
+
+        def interrupt(stats):
+            checkpoints.append(dict(stats))
+            raise KeyboardInterrupt
+
+        run = CustomerImport(chunk_size=3, on_reject=lambda n, reason, r: rejected.append(n), on_commit=interrupt)
+        with self.assertRaises(KeyboardInterrupt):
+            run.run(iter_records(self.csv_file(rows), "csv"))
+        self.assertEqual((checkpoints[0]["last_record"], checkpoints[0]["last_read"]), (3, 5))
+
+        run = CustomerImport(chunk_size=3, on_reject=lambda n, reason, r: rejected.append(n))
+        stats = run.run(iter_records(self.csv_file(rows), "csv"), resume=checkpoints[0])
+        self.assertEqual(rejected, [4])  # reported once
+        self.assertEqual(
+            (stats["read"], stats["imported"], stats["rejected"], stats["days"], stats["last_record"]),
+            (7, 6, 1, 2, 7),
+        )
+
+
+class TrendTests(TestCase):
+    def test_trend_from_counts(self):
+        today = timezone.localdate()
+        dates = [today - timedelta(days=i) for i in range(9, -1, -1)]
+        counts = {1: [3, 4, 5, 0, 25, 3, 3, 4, 0, 6], 2: [0] * 10}
+        trend = trend_from_counts(dates, counts)
+
+        self.assertEqual(trend["total"], 53)
+        self.assertEqual((trend["active_days"], trend["days_at_cap"]), (7, 1))
+        self.assertEqual(
+            trend["best_streak"],
+            {"user_id": 1, "length": 3, "start": dates[0], "end": dates[2]},
+        )
+        # weeks end today; the oldest one is shorter
+        self.assertEqual([(w["start"], w["end"]) for w in trend["weeks"]], [(dates[0], dates[2]), (dates[3], dates[9])])
+        self.assertEqual(trend["weeks"][0]["average"], round(12 / (3 * 2), 2))
+
+    def test_center_and_user_trends(self):
+        asha, bina = make_user("asha"), make_user("bina")
+        log_pattern(asha, [3, 4, 5, 6])
+        log_pattern(bina, [3, 3])
+        make_user("other", center="bbsr")
+        center_id = Center.objects.get(code="balasore").pk
+
+        with self.assertNumQueries(2):
+            trend = center_trends(center_id, days=180)
+        self.assertEqual((trend["days"], trend["users"], trend["total"]), (180, 2, 24))
+        self.assertEqual((trend["best_streak"]["username"], trend["best_streak"]["length"]), ("asha", 4))
+
+        mine = user_trends([bina], days=365)[bina.pk]
+        self.assertEqual((mine["total"], mine["best_streak"]["length"]), (6, 2))
+        with self.assertRaises(ValueError):
+            user_trends([bina], days=45)
+
+    def test_panels(self):
+        cache.clear()
+        asha = make_user("asha")
+        log_pattern(asha, [3, 4])
+        self.client.force_login(asha)
+        response = self.client.get("/home/", {"range": "365"})
+        self.assertEqual((response.context["trend_days"], response.context["trends"]["total"]), (365, 7))
+        self.assertContains(response, "Trends – last 365 days")
+
+        self.client.force_login(make_user("owner", role="centerowner"))
+        response = self.client.get("/center-dashboard/", {"range": "bogus"})
+        self.assertEqual(response.context["trend_days"], 90)
+        self.assertEqual(response.context["trends"]["best_streak"]["username"], "asha")
+
+
+class StaticAssetTests(SimpleTestCase):
+    MANIFEST_STORAGES = {
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
+    }
+
+    def test_collectstatic_hashes_and_compresses(self):
+        with tempfile.TemporaryDirectory() as root, self.settings(STATIC_ROOT=root, STORAGES=self.MANIFEST_STORAGES):
+            call_command("collectstatic", "--noinput", verbosity=0)
+            hashed = staticfiles_storage.stored_name("accounts/css/app.css")
+            self.assertRegex(hashed, r"^accounts/css/app\.[0-9a-f]{12}\.css$")
+            self.assertTrue(os.path.exists(os.path.join(root, hashed + ".gz")))
+
+            middleware = WhiteNoiseMiddleware(lambda request: None)
+            response = middleware(RequestFactory().get(f"/static/{hashed}", HTTP_ACCEPT_ENCODING="gzip"))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Encoding"], "gzip")
+            self.assertIn("immutable", response["Cache-Control"])
+            self.assertIn("max-age=315360000", response["Cache-Control"])
+            response.close()
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.asha = make_user("asha")
+        log_pattern(self.asha, [3, 4, 5])
+        make_user("bina")
+        self.owner = make_user("owner", role="centerowner")
+
+    async def test_async_home_matches_sync(self):
+        await sync_to_async(self.async_client.force_login)(self.asha)
+        response = await self.async_client.get("/async/home/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["streak_dates_counts"][-1][1], 5)
+        self.assertEqual(len(response.context["customers"]), 5)
+        self.assertIn("Server-Timing", response)
+
+        response = await self.async_client.post("/async/home/", {
+            "customer_name": ["a", "b"],
+            "customer_phone": ["1", "2"],
+        })
+        self.assertEqual(response.context["message"], "Saved! Total customers for today: 7")
+
+    async def test_async_center_dashboard(self):
+        await sync_to_async(self.async_client.force_login)(self.owner)
+        response = await self.async_client.get("/async/center-dashboard/")
+        users = {u["username"]: u for u in response.context["users_data"]}
+        self.assertEqual(users["asha"], {"username": "asha", "status": "Active", "count": 5})
+        self.assertEqual(response.context["trends"]["total"], 12)
+
+        await sync_to_async(self.async_client.force_login)(self.asha)
+        response = await self.async_client.get("/async/center-dashboard/")
+        self.assertEqual(response.status_code, 302)
+
+    async def test_login_required(self):
+        response = await self.async_client.get("/async/home/")
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response["Location"].startswith("/login/"))
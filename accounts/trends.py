@@ -0,0 +1,116 @@
+# accounts/trends.py
+"""
+Activity trends over longer ranges (90 / 180 / 365 days) for users and centers.
+
+Everything is read from the DailyCount rollup, one row per user per active
+day, so the cost grows with users x days and never with the number of
+customers. Streaks follow the same rules as the activity status
+(streak_step), counted from the start of the range.
+"""
+
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .activity_logic import daily_counts_between, streak_step
+from .models import DailyCount, Profile
+from .rollups import MAX_PER_DAY, MIN_NEW_DAY
+
+TREND_RANGES = (90, 180, 365)
+DEFAULT_TREND_DAYS = 90
+
+
+def trend_range(days=DEFAULT_TREND_DAYS, today=None):
+    """(start, end) of the `days`-day range ending today."""
+    if days not in TREND_RANGES:
+        raise ValueError(f"days must be one of {TREND_RANGES}")
+    end = today or timezone.localdate()
+    return end - timedelta(days=days - 1), end
+
+
+def trend_from_counts(dates, counts_by_user):
+    """
+    Trend summary of a group of users (one user is a group of one).
+
+    `dates` are oldest → newest and `counts_by_user` is {user_id: counts per date}.
+    Weeks are 7-day buckets ending on the last date; the oldest one may be
+    shorter. Weekly averages are customers per user per day.
+    """
+    users = len(counts_by_user)
+    daily_totals = [sum(day) for day in zip(*counts_by_user.values())] or [0] * len(dates)
+
+    weeks = []
+    for end in range(len(dates), 0, -7):
+        start = max(0, end - 7)
+        total = sum(daily_totals[start:end])
+        weeks.append({
+            "start": dates[start],
+            "end": dates[end - 1],
+            "total": total,
+            "average": round(total / ((end - start) * max(users, 1)), 2),
+        })
+    weeks.reverse()
+
+    best = {"user_id": None, "length": 0, "start": None, "end": None}
+    active_days = days_at_cap = 0
+    for uid, counts in counts_by_user.items():
+        state = (None, 0, None)
+        for day, count in zip(dates, counts):
+            state = streak_step(state, day, count)
+            if state[2] is not None:
+                length = (day - state[2]).days + 1
+                if length > best["length"]:
+                    best = {"user_id": uid, "length": length, "start": state[2], "end": day}
+            if MIN_NEW_DAY <= count < MAX_PER_DAY:
+                active_days += 1
+            if count >= MAX_PER_DAY:
+                days_at_cap += 1
+
+    return {
+        "start": dates[0],
+        "end": dates[-1],
+        "days": len(dates),
+        "users": users,
+        "total": sum(daily_totals),
+        "active_days": active_days,
+        "days_at_cap": days_at_cap,
+        "best_streak": best,
+        "weeks": weeks,
+    }
+
+
+def user_trends(users, days=DEFAULT_TREND_DAYS, today=None):
+    """{user_id: trend} for each of `users` (objects or ids), one query."""
+    start, end = trend_range(days, today)
+    dates, counts_by_user = daily_counts_between(users, start, end)
+    return {uid: trend_from_counts(dates, {uid: counts}) for uid, counts in counts_by_user.items()}
+
+
+def center_trends(center_id, days=DEFAULT_TREND_DAYS, today=None):
+    """
+    Trend of every normal user of a center taken together, in two queries
+    (the user list and their rollup rows, through the profile join).
+    best_streak also names the user who holds it.
+    """
+    start, end = trend_range(days, today)
+    usernames = dict(
+        Profile.objects
+        .filter(center_id=center_id, role="user")
+        .values_list("user_id", "user__username")
+    )
+
+    dates = [start + timedelta(days=i) for i in range(days)]
+    index = {d: i for i, d in enumerate(dates)}
+    counts_by_user = {uid: [0] * days for uid in usernames}
+    rows = (
+        DailyCount.objects
+        .filter(user__profile__center_id=center_id, user__profile__role="user", date__range=(start, end))
+        .values_list("user_id", "date", "count")
+    )
+    for uid, day, count in rows:
+        if uid in counts_by_user:  # skip a profile moved meanwhile
+            counts_by_user[uid][index[day]] = count
+
+    trend = trend_from_counts(dates, counts_by_user)
+    trend["best_streak"]["username"] = usernames.get(trend["best_streak"]["user_id"])
+    return trend
@@ -9,6 +9,18 @@ from .views import (
     center_dashboard_view,
     admin_dashboard_view,
     admin_center_dashboard_view,
+    admin_activity_export_view,
+    center_customers_view,
+)
+from .async_views import (
+    home_async_view,
+    center_dashboard_async_view,
+    admin_center_dashboard_async_view,
+)
+from .api import (
+    home_api_view,
+    center_dashboard_api_view,
+    admin_center_dashboard_api_view,
 )
 
 urlpatterns = [
@@ -17,6 +29,13 @@ urlpatterns = [
     path("center-login/", center_login_view, name="center_login"),
     path("home/", home_view, name="home"),
     path("center-dashboard/", center_dashboard_view, name="center_dashboard"),
+    path("center-dashboard/customers/", center_customers_view, name="center_customers"),
+    path("activity-export/", admin_activity_export_view, name="admin_activity_export"),
+    path("api/home/", home_api_view, name="home_api"),
+    path("api/center-dashboard/", center_dashboard_api_view, name="center_dashboard_api"),
+    # async versions, for deployments behind an ASGI server
+    path("async/home/", home_async_view, name="home_async"),
+    path("async/center-dashboard/", center_dashboard_async_view, name="center_dashboard_async"),
 ]
 
 # Local-only admin dashboard routes (only when DEBUG = True)
@@ -28,4 +47,14 @@ if settings.DEBUG:
             admin_center_dashboard_view,
             name="admin_center_dashboard",
         ),
+        path(
+            "async/admin-dashboard/<str:center_code>/",
+            admin_center_dashboard_async_view,
+            name="admin_center_dashboard_async",
+        ),
+        path(
+            "api/admin-dashboard/<str:center_code>/",
+            admin_center_dashboard_api_view,
+            name="admin_center_dashboard_api",
+        ),
     ]
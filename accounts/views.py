@@ -3,27 +3,35 @@ from datetime import date, timedelta
 from django.contrib.auth import authenticate, login
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.db.models import Count
-from django.shortcuts import render, redirect
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render, redirect
 from django.utils import timezone
+from django.utils.text import capfirst
 
-from .models import Profile, DailyCustomer
+from .models import Center, Profile, DailyCustomer, DailyCount
 from django.views.decorators.csrf import csrf_exempt
-from .activity_logic import compute_activity_status
+from .access import Access
+from .activity_sql import center_active_users
+from .center_directory import center_directory
+from .dashboard_cache import ALL_CENTERS, cached_center_page
+from .db import replica_reads_view
+from .reports import REPORT_FORMATS, iter_report_rows
+from .rollups import DailyLimitError, add_customers
+from .snapshots import WINDOW_DAYS, refresh_snapshots, snapshot_activity_status
+from .trends import DEFAULT_TREND_DAYS, TREND_RANGES, center_trends, user_trends
 
 @csrf_exempt
 def signup_view(request):
     """
     Signup page for new users/center owners.
-    Center list is dynamic:
-      - base centers: balasore, bbsr, basta
-      - plus any centers already used in Profile.center
+    Center list comes from the cached center directory (a center owner can add a new one).
     """
 
-    # Build dynamic center list for dropdown
-    base_centers = ["balasore", "bbsr", "basta"]
-    existing_centers = Profile.objects.values_list("center", flat=True).distinct()
-    centers = sorted({c for c in existing_centers if c} | set(base_centers))
+    # (code, name) pairs for the dropdown, built once per process
+    directory = center_directory()
+    centers = directory.choices
 
     if request.method == "POST":
         username_raw = request.POST.get("username")
@@ -75,14 +83,14 @@ def signup_view(request):
         else:
             # normal user must choose from dropdown only
             center_value = center_from_dropdown
-            if not center_value:
+            if center_value not in directory:
                 return render(request, "signup.html", {
                     "error": "Select a center",
                     "centers": centers,
                 })
 
         # rule: only one owner per center
-        if role == "centerowner" and Profile.objects.filter(role="centerowner", center=center_value).exists():
+        if role == "centerowner" and Center.objects.filter(code=center_value, owner__isnull=False).exists():
             return render(request, "signup.html", {
                 "error": "Center owner already exists for this center!",
                 "centers": centers,
@@ -109,11 +117,16 @@ def signup_view(request):
                 "centers": centers,
             })
 
-        # create user + profile
-        user = User.objects.create_user(username=username, email=email, password=password)
-        Profile.objects.create(user=user, role=role, center=center_value)
+        # create user + profile (+ the center, if a center owner added a new one)
+        with transaction.atomic():
+            user = User.objects.create_user(username=username, email=email, password=password)
+            center, _ = Center.objects.get_or_create(code=center_value, defaults={"name": capfirst(center_value)})
+            Profile.objects.create(user=user, role=role, center=center)
+            if role == "centerowner":
+                center.owner = user
+                center.save(update_fields=["owner"])
 
-        login(request, user)
+        login(request, user, backend="accounts.access.ProfileBackend")
         return redirect("home")
 
     # GET request: just show empty signup form
@@ -135,28 +148,19 @@ def login_view(request):
         if user is None:
             return render(request, "login.html", {"error": "Invalid username or password"})
 
-        # 1) If this is the Django superuser (admin) -> go to admin dashboard
-        if user.is_superuser:
-            login(request, user)
-            return redirect("admin_dashboard")
-
-        # 2) For all others, check profile
-        try:
-            profile = user.profile
-        except Profile.DoesNotExist:
-            profile = None
+        access = Access.for_user(user)  # profile came with the user, no query
 
         # Center owner should not log in here
-        if profile and profile.role == "centerowner":
+        if access.is_center_owner:
             return render(
                 request,
                 "login.html",
                 {"error": "This account is a Center Owner. Please use the Center Owner login page."},
             )
 
-        # 3) Normal user
+        # Superuser -> admin dashboard, normal user -> home
         login(request, user)
-        return redirect("home")
+        return redirect(access.landing)
 
     return render(request, "login.html")
 
@@ -169,12 +173,8 @@ def center_login_view(request):
 
         user = authenticate(request, username=username, password=password)
         if user:
-            try:
-                profile = user.profile
-            except Profile.DoesNotExist:
-                profile = None
-
-            if not profile or profile.role != "centerowner":
+            access = Access.for_user(user)
+            if not access.is_center_owner:
                 return render(
                     request,
                     "center_login.html",
@@ -182,7 +182,7 @@ def center_login_view(request):
                 )
 
             login(request, user)
-            return redirect("home")
+            return redirect(access.landing)
         else:
             return render(request, "center_login.html", {"error": "Invalid username or password"})
 
@@ -242,6 +242,32 @@ def _is_active_user(user):
 
 
 @login_required
+def save_posted_customers(request, selected_date, today):
+    """
+    Save the customers posted from the home page form for request.user
+    (shared by home_view and the async home). Returns (message, error).
+    """
+    # only allow adding for today
+    if selected_date != today:
+        return None, "You can only add customers for today."
+
+    names = request.POST.getlist("customer_name")
+    phones = request.POST.getlist("customer_phone")
+
+    customers_to_add = []
+    for n, p in zip(names, phones):
+        n = (n or "").strip()
+        p = (p or "").strip()
+        if n and p:
+            customers_to_add.append((n, p))
+
+    try:
+        total_after = add_customers(request.user, today, customers_to_add)
+    except DailyLimitError as e:
+        return None, str(e)
+    return f"Saved! Total customers for today: {total_after}", None
+
+
 def home_view(request):
     """
     Normal user home:
@@ -249,12 +275,9 @@ def home_view(request):
       - For users: show today's customers + streak info + calendar.
     """
     # 1) Center owner? → send to center dashboard
-    try:
-        profile = request.user.profile
-        if profile.role == "centerowner":
-            return redirect("center_dashboard")
-    except Profile.DoesNotExist:
-        profile = None
+    access = request.access
+    if access.is_center_owner:
+        return redirect(access.landing)
 
     # 2) Normal user behaviour
     today = timezone.localdate()
@@ -271,55 +294,26 @@ def home_view(request):
     error = None
 
     if request.method == "POST":
-        # only allow adding for today
-        if selected_date != today:
-            error = "You can only add customers for today."
-        else:
-            names = request.POST.getlist("customer_name")
-            phones = request.POST.getlist("customer_phone")
-
-            customers_to_add = []
-            for n, p in zip(names, phones):
-                n = (n or "").strip()
-                p = (p or "").strip()
-                if n and p:
-                    customers_to_add.append((n, p))
-
-            existing_count = DailyCustomer.objects.filter(user=request.user, date=today).count()
-            new_count = len(customers_to_add)
-            total_after = existing_count + new_count
-
-            if existing_count == 0 and total_after < 3:
-                error = "You must add at least 3 customers for a new day."
-            elif total_after > 25:
-                error = "You cannot have more than 25 customers in one day."
-            else:
-                for n, p in customers_to_add:
-                    DailyCustomer.objects.create(user=request.user, date=today, name=n, phone=p)
-                message = f"Saved! Total customers for today: {total_after}"
+        message, error = save_posted_customers(request, selected_date, today)
 
     customers = DailyCustomer.objects.filter(user=request.user, date=selected_date).order_by("id")
 
-    try:
-        profile = request.user.profile
-        role_code = profile.role
-        center_label = profile.center
-
-    except Profile.DoesNotExist:
-        role_code = "user"
-        center_label = ""
-
-    role_label = "User" if role_code == "user" else "Center Owner"
+    role_label = "Center Owner" if access.is_center_owner else "User"
 
     # --- streak / active logic using dynamic rule ---
-    is_active, streak_dates, streak_counts, current_limit = compute_activity_status(request.user)
+    is_active, streak_dates, streak_counts, current_limit = snapshot_activity_status(request.user, today)
     streak_status_text = "Active user" if is_active else "Inactive user"
 
+    trend_days = _trend_days(request)
+
     context = {
         "role_label": role_label,
-        "center_label": center_label,
+        "center_label": access.center_name,
         "selected_date": selected_date,
         "today": today,
+        "trends": user_trends([request.user], trend_days, today)[request.user.pk],
+        "trend_days": trend_days,
+        "trend_ranges": TREND_RANGES,
         "customers": customers,
         "message": message,
         "error": error,
@@ -330,7 +324,115 @@ def home_view(request):
     return render(request, "home.html", context)
 
 
+DASHBOARD_PAGE_SIZE = 50
+STATUS_FILTERS = ("active", "inactive")
+
+
+def _trend_days(request):
+    """?range=90|180|365 (days), default DEFAULT_TREND_DAYS."""
+    try:
+        days = int(request.GET.get("range") or DEFAULT_TREND_DAYS)
+    except ValueError:
+        return DEFAULT_TREND_DAYS
+    return days if days in TREND_RANGES else DEFAULT_TREND_DAYS
+
+
+def _center_trends_context(request, center_id, today):
+    """Trends panel of a center dashboard, cached with the center's pages."""
+    days = _trend_days(request)
+    return {
+        "trends": cached_center_page(center_id, ("trends", days, today), lambda: center_trends(center_id, days, today)),
+        "trend_days": days,
+        "trend_ranges": TREND_RANGES,
+    }
+
+
+def _center_dashboard_page(request, center_id, selected_date, search, today, rows_state=None):
+    """
+    One page of a center dashboard, shared by the owner and admin views.
+
+    Keyset pagination on username (?after=<username> / ?before=<username>),
+    so every page costs the same however deep it is. Only counts and
+    statuses are loaded; customer details come from center_customers_view
+    when a row is expanded. Pages are cached per center until that center's
+    data changes (see accounts/dashboard_cache.py); `rows_state` (the JSON
+    API's row fingerprint) also keeps a page built from older rows from
+    being served under a newer ETag.
+    """
+    after = request.GET.get("after") or None
+    before = request.GET.get("before") or None
+    status = _status_filter(request)
+
+    parts = (selected_date, search, after, before, today, DASHBOARD_PAGE_SIZE, status, rows_state)
+    return cached_center_page(
+        center_id, parts,
+        lambda: _build_center_dashboard_page(center_id, selected_date, search, after, before, today, status),
+    )
+
+
+def _status_filter(request):
+    """?status=active|inactive, anything else: no filter."""
+    status = request.GET.get("status") or ""
+    return status if status in STATUS_FILTERS else ""
+
+
+def _build_center_dashboard_page(center_id, selected_date, search, after, before, today, status=""):
+    user_qs = Profile.objects.filter(center_id=center_id, role="user")
+    if search:
+        user_qs = user_qs.filter(user__username__icontains=search)
+    if status:
+        # worked out by the database (window functions), so pages stay full
+        active = center_active_users(center_id, days=WINDOW_DAYS, today=today)
+        if status == "active":
+            user_qs = user_qs.filter(user_id__in=active)
+        else:
+            user_qs = user_qs.exclude(user_id__in=active)
+
+    if before:
+        user_qs = user_qs.filter(user__username__lt=before).order_by("-user__username")
+    else:
+        if after:
+            user_qs = user_qs.filter(user__username__gt=after)
+        user_qs = user_qs.order_by("user__username")
+
+    rows = list(user_qs.values_list("user_id", "user__username")[:DASHBOARD_PAGE_SIZE + 1])
+    has_more = len(rows) > DASHBOARD_PAGE_SIZE
+    rows = rows[:DASHBOARD_PAGE_SIZE]
+    if before:
+        rows.reverse()
+
+    user_ids = [uid for uid, _ in rows]
+
+    # Same dynamic streak logic as home_view, read from the stored snapshots
+    snapshots = refresh_snapshots(user_ids, today)
+
+    # customers per user on the selected date, from the rollup
+    counts = dict(
+        DailyCount.objects
+        .filter(user_id__in=user_ids, date=selected_date)
+        .values_list("user_id", "count")
+    )
+
+    users_data = [
+        {
+            "username": username,
+            "status": "Active" if snapshots[uid].is_active else "Inactive",
+            "count": counts.get(uid, 0),
+        }
+        for uid, username in rows
+    ]
+
+    has_next = has_more if not before else True
+    has_prev = has_more if before else bool(after)
+    return {
+        "users_data": users_data,
+        "next_after": users_data[-1]["username"] if users_data and has_next else None,
+        "prev_before": users_data[0]["username"] if users_data and has_prev else None,
+    }
+
+
 @login_required
+@replica_reads_view
 def center_dashboard_view(request):
     """
     Center owner dashboard:
@@ -338,17 +440,13 @@ def center_dashboard_view(request):
       - Shows each user of that center in a table
       - Date filter (calendar) to see customers on that date
       - Search bar to filter by username
-      - Shows for that date: count + list of customers (name + phone)
+      - Shows for that date: count per user; the list of customers
+        (name + phone) is loaded on demand per user
     """
-    try:
-        profile = request.user.profile
-    except Profile.DoesNotExist:
+    access = request.access
+    if not access.is_center_owner:
         return redirect("home")
 
-    if profile.role != "centerowner":
-        return redirect("home")
-
-    center = profile.center
     today = timezone.localdate()
 
     # --- filters from query params ---
@@ -364,71 +462,103 @@ def center_dashboard_view(request):
     except ValueError:
         selected_date = today
 
-    # base queryset: all users in this center
-    user_qs = (
-        Profile.objects
-        .filter(center=center, role="user")
-        .select_related("user")
-    )
-
-    # filter by username if search provided
-    if search:
-        user_qs = user_qs.filter(user__username__icontains=search)
-
-    users_data = []
-
-    for up in user_qs:
-        user = up.user
-
-        # Use same dynamic streak logic as home_view
-        is_active, _, _, _ = compute_activity_status(user)
-        status = "Active" if is_active else "Inactive"
-
-
-        # customers for selected date
-        customers_qs = (
-            DailyCustomer.objects
-            .filter(user=user, date=selected_date)
-            .order_by("id")
-        )
-        customers = [{"name": c.name, "phone": c.phone} for c in customers_qs]
-        count_for_date = len(customers)
-
-        users_data.append({
-            "username": user.username,
-            "status": status,
-            "count": count_for_date,
-            "customers": customers,
-            # optional: use in template if you like
-        })
-
     context = {
-        "center_label": profile.center,
-        "users_data": users_data,
+        "center_label": access.center_name,
         "today": today,
         "selected_date": selected_date,
         "search": search,
+        "status": _status_filter(request),
     }
+    context.update(_center_dashboard_page(request, access.center_id, selected_date, search, today))
+    context.update(_center_trends_context(request, access.center_id, today))
     return render(request, "center_dashboard.html", context)
+
+
 @login_required
+@replica_reads_view
 def admin_dashboard_view(request):
     """
     Admin dashboard (local only):
       - Only Django superuser
-      - Shows dynamic list of centers based on Profile.center
+      - One row per center (from the Center table) with
+        users, active / inactive users, today's customers and the last
+        30 days' customers
     """
     if not request.user.is_superuser:
         return redirect("home")
 
-    # dynamic list of centers: all distinct Profile.center values
-    centers_qs = Profile.objects.values_list("center", flat=True).distinct()
-    centers = sorted(c for c in centers_qs if c)  # remove None / empty
+    today = timezone.localdate()
+    centers = cached_center_page(ALL_CENTERS, (today,), lambda: _build_center_summaries(today))
+    return render(request, "admin_dashboard.html", {"centers": centers, "today": today})
 
-    return render(request, "admin_dashboard.html", {"centers": centers})
 
+def _build_center_summaries(today):
+    """
+    Per-center summary rows in a constant number of grouped queries.
+
+    Active users are read from the activity snapshots as they stand: a
+    user whose snapshot is missing or not on `today` yet counts as inactive
+    until close_activity_day (or their own next page view) brings it up to
+    date. Nothing is refreshed here, so the page costs the same for any
+    number of users.
+    """
+    users, totals_qs = center_summary_queries(today)
+    totals = {row["user__profile__center_id"]: row for row in totals_qs}
+
+    centers = []
+    for row in users:
+        center_totals = totals.get(row["id"], {})
+        centers.append({
+            "code": row["code"],
+            "name": row["name"],
+            "users": row["users"],
+            "active": row["active"],
+            "inactive": row["users"] - row["active"],
+            "today_total": center_totals.get("today_total") or 0,
+            "total_30": center_totals.get("total_30") or 0,
+        })
+    return centers
+
+
+def center_summary_queries(today):
+    """
+    The two grouped querysets behind _build_center_summaries (also EXPLAINed
+    by check_query_plans): users / active users per center, and customer
+    totals per center for today and the last 30 days.
+    """
+    start_30 = today - timedelta(days=29)
+
+    users = (
+        Center.objects
+        .order_by("code")
+        .values("id", "code", "name")
+        .annotate(
+            users=Count("profiles", filter=Q(profiles__role="user")),
+            active=Count(
+                "profiles",
+                filter=Q(
+                    profiles__role="user",
+                    profiles__user__activity_snapshot__as_of=today,
+                    profiles__user__activity_snapshot__is_active=True,
+                ),
+            ),
+        )
+    )
+    totals = (
+        DailyCount.objects
+        .filter(user__profile__role="user", date__range=(start_30, today))
+        .order_by()
+        .values("user__profile__center_id")
+        .annotate(
+            today_total=Sum("count", filter=Q(date=today)),
+            total_30=Sum("count"),
+        )
+    )
+    return users, totals
 
 
 @login_required
+@replica_reads_view
 def admin_center_dashboard_view(request, center_code):
     """
     Admin view of a single center's dashboard.
@@ -451,51 +581,78 @@ def admin_center_dashboard_view(request, center_code):
     except ValueError:
         selected_date = today
 
-    # all users in the selected center
-    user_qs = (
-        Profile.objects
-        .filter(center=center_code, role="user")
-        .select_related("user")
-    )
-
-    if search:
-        user_qs = user_qs.filter(user__username__icontains=search)
-
-    users_data = []
-
-    for up in user_qs:
-        user = up.user
-
-        # use same dynamic streak logic
-        is_active, _, _, _ = compute_activity_status(user)
-        status = "Active" if is_active else "Inactive"
-
-
-        customers_qs = (
-            DailyCustomer.objects
-            .filter(user=user, date=selected_date)
-            .order_by("id")
-        )
-        customers = [{"name": c.name, "phone": c.phone} for c in customers_qs]
-        count_for_date = len(customers)
-
-        users_data.append({
-            "username": user.username,
-            "status": status,
-            "count": count_for_date,
-            "customers": customers,
-            
-        })
-
-    center_label = center_code  # or center_code.title() if you want it pretty
-
+    center = get_object_or_404(Center, code=center_code)
+    center_label = center.name
 
     context = {
         "center_label": center_label,
-        "users_data": users_data,
         "today": today,
         "selected_date": selected_date,
         "search": search,
+        "status": _status_filter(request),
         "is_admin_view": True,  # if you ever want to show 'Admin view' badge in template
     }
+    context.update(_center_dashboard_page(request, center.pk, selected_date, search, today))
+    context.update(_center_trends_context(request, center.pk, today))
     return render(request, "center_dashboard.html", context)
+
+
+@login_required
+@replica_reads_view
+def center_customers_view(request):
+    """
+    Customers of one user on one date, as JSON (loaded when a dashboard row is expanded).
+      - ?user=<username>&date=YYYY-MM-DD
+      - superuser: any user; center owner: users of their own center only
+    """
+    username = request.GET.get("user") or ""
+    try:
+        selected_date = date.fromisoformat(request.GET.get("date") or "")
+    except ValueError:
+        return JsonResponse({"error": "date must be YYYY-MM-DD"}, status=400)
+
+    target = (
+        Profile.objects
+        .filter(user__username=username, role="user")
+        .values_list("user_id", "center_id")
+        .first()
+    )
+    if target is None:
+        return JsonResponse({"error": "Unknown user"}, status=404)
+
+    if not request.access.can_view_center(target[1]):
+        return JsonResponse({"error": "Not allowed"}, status=403)
+
+    customers = list(
+        DailyCustomer.objects
+        .filter(user_id=target[0], date=selected_date)
+        .order_by("id")
+        .values("name", "phone")
+    )
+    return JsonResponse({
+        "username": username,
+        "date": selected_date.isoformat(),
+        "customers": customers,
+    })
+
+
+@login_required
+def admin_activity_export_view(request):
+    """
+    Admin activity report as a streamed download (superuser only).
+      - ?format=csv (default) or ?format=jsonl
+      - same columns as admin_activity_report.py, last 30 days
+    Rows are produced while the response is being sent, so memory stays
+    flat and the first bytes go out immediately.
+    """
+    if not request.user.is_superuser:
+        return redirect("home")
+
+    fmt = request.GET.get("format", "csv")
+    if fmt not in REPORT_FORMATS:
+        return HttpResponseBadRequest("format must be one of: " + ", ".join(REPORT_FORMATS))
+
+    iter_lines, content_type, extension = REPORT_FORMATS[fmt]
+    response = StreamingHttpResponse(iter_lines(iter_report_rows()), content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="admin_activity_report.{extension}"'
+    return response
@@ -1,127 +1,333 @@
 import os
 import django
+import argparse
 import csv
-from datetime import timedelta
-
-from django.utils import timezone
-from django.db.models import Count
+import json
+import multiprocessing
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from itertools import groupby, repeat
 
 # 1) Point to your Django settings
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mysite.settings")
 django.setup()
 
-from accounts.models import Profile, DailyCustomer  # noqa: E402
+from accounts.models import Center  # noqa: E402
+from accounts.reports import (  # noqa: E402
+    REPORT_FIELDS,
+    REPORT_FORMATS,
+    build_report_rows,
+    iter_report_rows,
+    report_counts,
+    report_profiles,
+    report_range,
+    report_rows_for,
+    report_watermark,
+    snapshot_statuses,
+    touched_report_users,
+    write_report,
+)
+
 
+class StaleReport(Exception):
+    """The existing report file cannot be patched (users moved or renamed): rebuild it."""
 
-def daily_counts_for_user(user, days=30):
+
+def build_admin_report(start=None, end=None, centers=None, output=None, fmt="csv", workers=1, full=False):
     """
-    Returns:
-      - dates: list of dates (oldest → newest)
-      - counts: list of customer counts per date
+    Write the admin activity report: one row per user per date.
+
+    - start / end: report dates (default: the last 30 days)
+    - centers: only these centers (default: all)
+    - output: file path (default: admin_activity_report.<format>)
+    - fmt: "csv" or "jsonl"
+    - workers: more than 1 splits the work by center, see build_sharded_report()
+    - full: rebuild the whole file even when it could be patched
+
+    A watermark is saved next to the file (<output>.watermark.json). When
+    the previous run was for the same centers and format, and for the same
+    dates or the same number of days ending later (the default range on a
+    new day), the file is patched instead of rebuilt (refresh_report);
+    otherwise the whole report is rebuilt, in a constant number of queries
+    whatever the number of users.
     """
-    today = timezone.localdate()
-    start_date = today - timedelta(days=days - 1)
-
-    qs = (
-        DailyCustomer.objects
-        .filter(user=user, date__range=(start_date, today))
-        .values("date")
-        .annotate(count=Count("id"))
+    start, end = report_range(start, end)
+    extension = REPORT_FORMATS[fmt][2]
+    filename = output or f"admin_activity_report.{extension}"
+
+    state = {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "centers": sorted(centers) if centers else None,
+        "format": fmt,
+        **report_watermark(),  # before any report row is read
+    }
+    previous = read_watermark(filename)
+    shift = _shift_since(previous, state) if previous and not full and os.path.exists(filename) else None
+
+    if shift is not None:
+        try:
+            recomputed = refresh_report(filename, previous, start, end, centers, fmt, shift=shift)
+        except StaleReport:
+            pass
+        else:
+            write_watermark(filename, state)
+            moved = f", {shift} new days" if shift else ""
+            print(f"✅ Admin report refreshed: {filename} ({recomputed} users recomputed{moved})")
+            return filename
+
+    if workers > 1:
+        build_sharded_report(start=start, end=end, centers=centers, output=filename, fmt=fmt, workers=workers)
+    else:
+        write_report(filename, build_report_rows(start=start, end=end, centers=centers), fmt)
+        print(f"✅ Admin report created: {filename}")
+    write_watermark(filename, state)
+    print("   Open this file in Excel to view all centres' activity.")
+    return filename
+
+
+def watermark_path(filename):
+    return f"{filename}.watermark.json"
+
+
+def read_watermark(filename):
+    """Watermark saved with `filename` by the last run (None without one)."""
+    try:
+        with open(watermark_path(filename), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_watermark(filename, state):
+    with open(watermark_path(filename), "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+
+
+def _shift_since(previous, state):
+    """
+    Days the report window moved forward since `previous` (0: same dates),
+    or None when the old file cannot be patched into the new one.
+    """
+    if any(previous.get(key) != state[key] for key in ("centers", "format")):
+        return None
+    old_start, old_end, start, end = (
+        date.fromisoformat(d) for d in (previous["start"], previous["end"], state["start"], state["end"])
     )
+    shift = (end - old_end).days
+    days = (end - start).days + 1
+    if (start - old_start).days != shift or not 0 <= shift < days:
+        return None
+    return shift
 
-    count_map = {row["date"]: row["count"] for row in qs}
-    dates = [start_date + timedelta(days=i) for i in range(days)]
-    counts = [count_map.get(d, 0) for d in dates]
-    return dates, counts
 
+def _parse_line(line, fmt):
+    """One report line back to its row."""
+    if fmt == "csv":
+        row = dict(zip(REPORT_FIELDS, next(csv.reader([line]))))
+        row["CallsThatDay"], row["CurrentLimit"] = int(row["CallsThatDay"]), int(row["CurrentLimit"])
+        return row
+    return json.loads(line)
 
-def is_active_and_limit(user):
+
+def _line_key(line, fmt):
+    """(center, username) of one report line."""
+    if fmt == "csv":
+        center, username = next(csv.reader([line]))[:2]
+        return center, username
+    row = json.loads(line)
+    return row["Center"], row["Username"]
+
+
+def _shifted_lines(lines, fmt, shift, new_dates, counts, status):
+    """A user's lines with the `shift` oldest days dropped, the new days appended and the new status."""
+    iter_lines = REPORT_FORMATS[fmt][0]
+    label, limit = status
+    rows = [_parse_line(line, fmt) for line in lines[shift:]]
+    center, username = rows[0]["Center"], rows[0]["Username"]
+    rows = [{**row, "StatusLast7Days": label, "CurrentLimit": limit} for row in rows]
+    rows += [
+        {
+            "Center": center,
+            "Username": username,
+            "Date": d.isoformat(),
+            "CallsThatDay": counts.get(d, 0),
+            "StatusLast7Days": label,
+            "CurrentLimit": limit,
+        }
+        for d in new_dates
+    ]
+    return list(iter_lines(rows))[1 if fmt == "csv" else 0:]
+
+
+def refresh_report(filename, watermark, start, end, centers, fmt, shift=0):
     """
-    Same logic as your site:
+    Patch the report in `filename`, built at `watermark` for the same
+    dates (shift=0) or for the same number of days ending `shift` days
+    earlier, in place.
+
+    Users touched since the watermark (touched_report_users) are
+    recomputed. Every other user's lines are copied from the old file in
+    the report order; on a shift, their oldest days are dropped, the new
+    days appended and their status taken from their activity snapshot
+    (users without a snapshot on `end` are recomputed). Users no longer in
+    the report are left out. Returns the number of users recomputed.
 
-    - Look at last 7 days (including today).
-    - If any day < 3 -> Inactive, limit = 3
-    - Else Active, limit = minimum count in last 7 days.
+    Raises StaleReport when the old file does not follow the current users
+    (a user moved to another center or was renamed): run a full rebuild.
+    Deleted customers are not seen by the watermark either: use --full.
     """
-    today = timezone.localdate()
-    start_7 = today - timedelta(days=6)
-
-    # counts for last 7 days
-    qs = (
-        DailyCustomer.objects
-        .filter(user=user, date__range=(start_7, today))
-        .values("date")
-        .annotate(count=Count("id"))
+    iter_lines, _, _ = REPORT_FORMATS[fmt]
+    header_lines = 1 if fmt == "csv" else 0
+    days = (end - start).days + 1
+
+    touched = touched_report_users(watermark, start, end, centers)
+    profiles = list(report_profiles(centers))
+    if shift:
+        new_dates = [end - timedelta(days=i) for i in range(shift - 1, -1, -1)]
+        new_counts = report_counts(new_dates[0], end, centers)
+        statuses = snapshot_statuses(end, centers)
+        touched |= {uid for uid, _, _ in profiles if uid not in statuses}
+
+    fresh_profiles = [p for p in profiles if p[0] in touched]
+    lines = list(iter_lines(report_rows_for(fresh_profiles, start, end)))[header_lines:]
+    fresh = {
+        (center, username): lines[i * days:(i + 1) * days]
+        for i, (_, center, username) in enumerate(fresh_profiles)
+    }
+
+    patched = f"{filename}.patch"
+    try:
+        with open(filename, newline="", encoding="utf-8") as old, \
+                open(patched, "w", newline="", encoding="utf-8") as out:
+            for _ in range(header_lines):
+                out.write(old.readline())
+            blocks = groupby(old, key=lambda line: _line_key(line, fmt))
+            for uid, center, username in profiles:
+                key = (center, username)
+                if uid in touched:
+                    out.writelines(fresh[key])
+                    continue
+                # skip removed and recomputed users up to this user's lines
+                for old_key, block in blocks:
+                    if old_key == key:
+                        block = list(block)
+                        if shift:
+                            block = _shifted_lines(
+                                block, fmt, shift, new_dates, new_counts.get(uid, {}), statuses[uid],
+                            )
+                        out.writelines(block)
+                        break
+                else:
+                    raise StaleReport(f"{username} ({center}) is not in {filename}")
+        os.replace(patched, filename)
+    finally:
+        if os.path.exists(patched):
+            os.remove(patched)
+    return len(fresh_profiles)
+
+
+def write_center_part(center_code, start, end, fmt, directory):
+    """
+    Worker: write one center's rows to <directory>/<center code>.<format>.
+    Runs in its own process with its own database connection.
+    """
+    path = os.path.join(directory, f"{center_code}.{REPORT_FORMATS[fmt][2]}")
+    return write_report(path, iter_report_rows(start=start, end=end, centers=[center_code]), fmt)
+
+
+def merge_parts(parts, filename, fmt):
+    """Concatenate the part files in the given order, keeping a single CSV header."""
+    header_lines = 1 if fmt == "csv" else 0
+    with open(filename, "w", newline="", encoding="utf-8") as out:
+        if not parts:
+            iter_lines = REPORT_FORMATS[fmt][0]
+            out.writelines(iter_lines([]))  # the header alone, as in the one-pass report
+        for i, part in enumerate(parts):
+            with open(part, newline="", encoding="utf-8") as f:
+                for n, line in enumerate(f):
+                    if n >= header_lines or i == 0:
+                        out.write(line)
+
+
+def build_sharded_report(start=None, end=None, centers=None, output=None, fmt="csv", workers=None):
+    """
+    Same file as build_admin_report(), built by center on a process pool.
+
+    Each worker writes one part file per center (write_center_part); the
+    parts are merged in center id order, the order of the one-pass report,
+    so the output does not depend on which worker finished first.
+    workers=1 writes the parts in this process.
+    """
+    start, end = report_range(start, end)  # one "today" for every worker
+    _, _, extension = REPORT_FORMATS[fmt]
+    filename = output or f"admin_activity_report.{extension}"
+
+    qs = Center.objects.order_by("id")
+    if centers:
+        qs = qs.filter(code__in=centers)
+    codes = list(qs.values_list("code", flat=True))
+
+    parts_dir = tempfile.mkdtemp(prefix="report-parts-", dir=os.path.dirname(os.path.abspath(filename)))
+    try:
+        args = (codes, repeat(start), repeat(end), repeat(fmt), repeat(parts_dir))
+        if workers == 1:
+            parts = list(map(write_center_part, *args))
+        else:
+            # spawn: every worker sets Django up and opens its own connection
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                parts = list(pool.map(write_center_part, *args))
+        merge_parts(parts, filename, fmt)
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+    print(f"✅ Admin report created: {filename} ({len(codes)} centers)")
+    return filename
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the admin activity report.")
+    parser.add_argument("--start", type=date.fromisoformat, help="first date (YYYY-MM-DD), default: end - 29 days")
+    parser.add_argument("--end", type=date.fromisoformat, help="last date (YYYY-MM-DD), default: today")
+    parser.add_argument(
+        "--center",
+        action="append",
+        dest="centers",
+        help="only this center (repeat for several), default: all centers",
     )
-    count_map = {row["date"]: row["count"] for row in qs}
-    dates_7 = [start_7 + timedelta(days=i) for i in range(7)]
-    counts_7 = [count_map.get(d, 0) for d in dates_7]
-
-    if not counts_7:
-        return False, 3  # no data -> inactive, base limit 3
-
-    if any(c < 3 for c in counts_7):
-        return False, 3
-
-    # all >= 3 => active, limit is smallest
-    current_limit = min(counts_7)
-    return True, current_limit
-
-
-def build_admin_report():
-    today = timezone.localdate()
-    start_30 = today - timedelta(days=29)
-
-    rows = []
-
-    # all normal users from all centres
-    profiles = Profile.objects.filter(role="user").select_related("user")
-
-    for p in profiles:
-        user = p.user
-        center_name = p.get_center_display()
-        username = user.username
-
-        # last 30 days counts
-        dates_30, counts_30 = daily_counts_for_user(user, days=30)
-        date_to_count = {d: c for d, c in zip(dates_30, counts_30)}
-
-        # active + limit from last 7 days
-        active, current_limit = is_active_and_limit(user)
-        status = "Active" if active else "Inactive"
-
-        # one row per date (for Excel-style layout)
-        for d in dates_30:
-            count_for_date = date_to_count.get(d, 0)
-
-            rows.append({
-                "Center": center_name,
-                "Username": username,
-                "Date": d.isoformat(),
-                "CallsThatDay": count_for_date,
-                "StatusLast7Days": status,
-                "CurrentLimit": current_limit,
-            })
-
-    filename = "admin_activity_report.csv"
-    with open(filename, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=[
-                "Center",
-                "Username",
-                "Date",
-                "CallsThatDay",
-                "StatusLast7Days",
-                "CurrentLimit",
-            ],
-        )
-        writer.writeheader()
-        writer.writerows(rows)
-
-    print(f"✅ Admin report created: {filename}")
-    print("   Open this file in Excel to view all centres' activity.")
+    parser.add_argument("--output", "-o", help="output file, default: admin_activity_report.<format>")
+    parser.add_argument("--format", choices=sorted(REPORT_FORMATS), default="csv", dest="fmt")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="rebuild the whole report instead of patching the users touched since the last run",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="processes to split the report by center over (default: 1, a single pass)",
+    )
+
+    args = parser.parse_args(argv)
+    if args.start and args.end and args.start > args.end:
+        parser.error("--start is after --end")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    return args
 
 
 if __name__ == "__main__":
-    build_admin_report()
+    args = parse_args()
+    build_admin_report(
+        start=args.start,
+        end=args.end,
+        centers=args.centers,
+        output=args.output,
+        fmt=args.fmt,
+        workers=args.workers,
+        full=args.full,
+    )
@@ -4,7 +4,9 @@ import os
 import sys
 
 def main():
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
+    # the test suite runs on its own settings module (see mysite/test_settings.py)
+    test_run = sys.argv[1:2] == ['test']
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.test_settings' if test_run else 'mysite.settings')
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
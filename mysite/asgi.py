@@ -4,4 +4,7 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
 
+# Serve with an ASGI server so the async views (accounts/async_views.py)
+# don't pin a worker thread while they wait, e.g.:
+#   gunicorn mysite.asgi:application -k uvicorn.workers.UvicornWorker
 application = get_asgi_application()
@@ -17,16 +17,20 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'whitenoise.runserver_nostatic',  # runserver serves static files the way production does
     'django.contrib.staticfiles',
     'accounts',
 ]
 
 MIDDLEWARE = [
+    'accounts.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.access.AccessMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -35,7 +39,7 @@ ROOT_URLCONF = 'mysite.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'accounts.instrumentation.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -58,6 +62,84 @@ DATABASES = {
     )
 }
 
+# Dashboard, report and export reads (see accounts/db.py): a replica from
+# DATABASE_REPLICA_URL, else a second, read-only connection to the default
+# database. Under the test runner the replica mirrors the test database
+# instead of getting one of its own.
+DATABASE_READ_ALIAS = "replica"
+DATABASES[DATABASE_READ_ALIAS] = {
+    **(
+        dj_database_url.parse(os.environ["DATABASE_REPLICA_URL"], conn_max_age=600)
+        if os.environ.get("DATABASE_REPLICA_URL")
+        else DATABASES["default"]
+    ),
+    "TEST": {"MIRROR": "default"},
+}
+DATABASE_ROUTERS = ["accounts.db.ReadReplicaRouter"]
+
+# Dashboard pages, ETag versions and the center directory are invalidated
+# on write, so every worker must see the same cache: file-based by default
+# (shared by the workers of one host), redis / memcached through the
+# environment when the workers span several hosts. Never a per-process
+# backend outside the tests.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.filebased.FileBasedCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", str(BASE_DIR / "cache")),
+    }
+}
+
+# seconds a cached center dashboard page may live (it is also dropped as
+# soon as the center's data changes)
+DASHBOARD_CACHE_TIMEOUT = 300
+
+# Max SQL queries per request, by URL name (see accounts/instrumentation.py).
+# Cold-cache worst cases; none of them may grow with the size of a center.
+# Over budget: raise with DEBUG (and in the tests), log a warning otherwise.
+QUERY_BUDGETS = {
+    "signup": 24,
+    "login": 12,
+    "center_login": 12,
+    "home": 24,  # first add of the day also creates the rollup row and snapshot
+    "home_api": 10,
+    "center_dashboard": 12,
+    "center_dashboard_api": 10,
+    "center_customers": 6,
+    "admin_activity_export": 4,  # rows stream after the view returns
+    "admin_dashboard": 8,  # snapshots are advanced by close_activity_day, not here
+    "admin_center_dashboard": 12,
+    "admin_center_dashboard_api": 10,
+    "home_async": 24,
+    "center_dashboard_async": 12,
+    "admin_center_dashboard_async": 12,
+}
+DEFAULT_QUERY_BUDGET = None
+QUERY_BUDGET_RAISE = DEBUG
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        # one JSON line per request: url name, queries, db / view / template ms
+        "accounts.metrics": {
+            "handlers": ["console"],
+            "level": os.environ.get("METRICS_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+    },
+}
+
+
+# ProfileBackend loads the profile and center with the user (see
+# accounts/access.py); ModelBackend stays listed so the sessions it signed
+# in before ProfileBackend existed stay valid
+AUTHENTICATION_BACKENDS = [
+    'accounts.access.ProfileBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -84,6 +166,16 @@ USE_TZ = True
 STATIC_URL = "/static/"
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 
+# collectstatic writes content-hashed copies plus .gz / .br variants;
+# WhiteNoise serves the hashed ones with a far-future, immutable
+# Cache-Control. The tests render templates without a manifest.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
+}
+# look files up per request in development (no collectstatic run)
+WHITENOISE_AUTOREFRESH = DEBUG
+
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
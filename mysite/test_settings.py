@@ -0,0 +1,36 @@
+"""
+Settings for the test suite.
+
+`python manage.py test` uses them; any other runner (pytest-django...)
+should be pointed at them with DJANGO_SETTINGS_MODULE=mysite.test_settings.
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import LOGGING, STORAGES
+
+# The "replica" alias mirrors the test database (TEST["MIRROR"]), but
+# TestCase data lives in an open transaction on "default" that a second
+# connection cannot see: reads stay on "default" (tests that exercise the
+# routing switch the read alias on themselves)
+DATABASE_READ_ALIAS = None
+
+# one process, no external services
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "coaching-dashboard-tests",
+    }
+}
+
+QUERY_BUDGET_RAISE = True
+
+LOGGING["loggers"]["accounts.metrics"]["level"] = os.environ.get("METRICS_LOG_LEVEL", "WARNING")
+
+# templates are rendered without a collectstatic run / manifest
+STORAGES = {
+    **STORAGES,
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+WHITENOISE_AUTOREFRESH = True